@@ -0,0 +1,286 @@
+"""
+This module provides external sorting of files that don't fit in memory.
+    > External merge sort
+      The input is processed in three stages:
+        1. the file is read in chunks that fit into the memory budget
+           and every chunk is sorted in memory;
+        2. every sorted chunk is written to a binary run file in a
+           temporary directory;
+        3. the runs are merged with a k-way heap merge that reads each
+           run through a small buffer (or a memory map). When there are
+           more runs than the fan-in allows, intermediate merge passes
+           combine them into longer runs first.
+      Reads and writes are sequential, so the sort costs
+      O(n * lg(n)) comparisons and about 2 * (1 + passes) sequential
+      passes over the data, where passes = log_fanin(runs) - 1.
+
+    Records are fixed width binary values described by a struct format,
+    e.g. "<q" for little-endian 64-bit integers or "<qd" for an
+    (integer, double) pair which is sorted lexicographically.
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+
+from sorting import merge_sorted, sort
+
+# Memory used for sorting a single chunk
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Maximum number of runs merged at once
+DEFAULT_FAN_IN = 64
+# Size of the read/write buffer of every run
+DEFAULT_BUFFER_SIZE = 64 * 1024
+# Rough size of a boxed value plus its list slot, used to turn the
+# memory budget into a number of records
+RECORD_OVERHEAD = 64
+
+
+class RecordCodec:
+    """
+    This class describes the binary layout of the records and
+    packs/unpacks them in blocks. Records with a single field are
+    represented by plain values, records with several fields by tuples.
+    """
+    def __init__(self, record_format):
+        self.record = struct.Struct(record_format)
+        self.size = self.record.size
+        self.single = len(self.record.unpack(bytes(self.size))) == 1
+
+    def unpack_many(self, buffer):
+        """
+        Unpacks all the records in the buffer.
+        :param buffer: bytes-like object with a whole number of records
+        :return: list of values
+        """
+        if self.single:
+            return [values[0] for values in self.record.iter_unpack(buffer)]
+        return list(self.record.iter_unpack(buffer))
+
+    def pack_many(self, values):
+        """
+        Packs the values into a single bytes object.
+        :param values:
+        :return:
+        """
+        pack = self.record.pack
+        if self.single:
+            return b"".join([pack(value) for value in values])
+        return b"".join([pack(*value) for value in values])
+
+
+###############################################################
+# External Sort                                               #
+###############################################################
+def ExternalSort(input_path, output_path=None, record_format="<q",
+                 memory_budget=DEFAULT_MEMORY_BUDGET, chunk_size=None,
+                 fan_in=DEFAULT_FAN_IN, buffer_size=DEFAULT_BUFFER_SIZE,
+                 use_mmap=False, tmp_dir=None):
+    """
+    Sorts a binary file of fixed width records.
+    :param input_path: file with the records to sort
+    :param output_path: file for the sorted records; if None the sorted
+                        values are returned as a generator instead
+    :param record_format: struct format of a single record
+    :param memory_budget: approximate memory in bytes for sorting a chunk
+    :param chunk_size: number of records per chunk, overrides the budget
+    :param fan_in: maximum number of runs merged at once
+    :param buffer_size: read/write buffer size in bytes per run
+    :param use_mmap: read the runs through memory maps instead of buffers
+    :param tmp_dir: parent directory of the temporary run files
+    :return: output_path, or a generator of sorted values; its run
+             files are removed when it is exhausted, closed or collected
+    """
+    if fan_in < 2:
+        raise ValueError("fan_in must be at least 2")
+
+    codec = RecordCodec(record_format)
+    if chunk_size is None:
+        chunk_size = max(1, memory_budget // (codec.size + RECORD_OVERHEAD))
+
+    work_dir = tempfile.mkdtemp(prefix="externalsort-", dir=tmp_dir)
+    try:
+        runs = create_runs(input_path, codec, chunk_size, work_dir)
+        runs = reduce_runs(runs, codec, fan_in, buffer_size, use_mmap, work_dir)
+    except BaseException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    if output_path is None:
+        merged = _merge_to_generator(runs, codec, buffer_size, use_mmap, work_dir)
+        # The generator's finally never runs if it is never started, so
+        # the runs are also removed when it is collected or at exit
+        weakref.finalize(merged, shutil.rmtree, work_dir, True)
+        return merged
+
+    try:
+        write_run(output_path, merge_runs(runs, codec, buffer_size, use_mmap), codec, buffer_size)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return output_path
+
+
+def create_runs(input_path, codec, chunk_size, work_dir):
+    """
+    Stage 1 and 2: reads the input chunk by chunk, sorts every chunk
+    in memory and spills it to a run file.
+    :param input_path:
+    :param codec:
+    :param chunk_size: number of records per chunk
+    :param work_dir:
+    :return: list of run file paths
+    """
+    runs = []
+    chunk_bytes = chunk_size * codec.size
+    with open(input_path, "rb") as f:
+        while True:
+            buffer = f.read(chunk_bytes)
+            if not buffer:
+                break
+            if len(buffer) % codec.size:
+                raise ValueError("{0} is not a whole number of {1} byte records".format(
+                    input_path, codec.size))
+
+            values = codec.unpack_many(buffer)
+            del buffer
+            sort(values)
+
+            path = os.path.join(work_dir, "run-{0}.bin".format(len(runs)))
+            with open(path, "wb") as run:
+                run.write(codec.pack_many(values))
+            runs.append(path)
+
+    return runs
+
+
+def reduce_runs(runs, codec, fan_in, buffer_size, use_mmap, work_dir):
+    """
+    Merges groups of fan_in runs into longer runs until at most
+    fan_in runs are left for the final merge.
+    :param runs:
+    :param codec:
+    :param fan_in:
+    :param buffer_size:
+    :param use_mmap:
+    :param work_dir:
+    :return: list of run file paths
+    """
+    merge_pass = 0
+    while len(runs) > fan_in:
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            group = runs[start:start + fan_in]
+            path = os.path.join(work_dir, "pass-{0}-run-{1}.bin".format(merge_pass, len(merged)))
+            write_run(path, merge_runs(group, codec, buffer_size, use_mmap), codec, buffer_size)
+            for run in group:
+                os.remove(run)
+            merged.append(path)
+        runs = merged
+        merge_pass += 1
+
+    return runs
+
+
+def read_run(path, codec, buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False):
+    """
+    Generator that streams the values of a run file, unpacking a
+    whole buffer of records at a time.
+    :param path:
+    :param codec:
+    :param buffer_size: bytes read per block
+    :param use_mmap: map the file instead of reading it
+    :return:
+    """
+    block = max(1, buffer_size // codec.size) * codec.size
+    with open(path, "rb") as f:
+        if use_mmap:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for start in range(0, len(view), block):
+                        yield from codec.unpack_many(view[start:start + block])
+                finally:
+                    view.release()
+        else:
+            while True:
+                buffer = f.read(block)
+                if not buffer:
+                    break
+                yield from codec.unpack_many(buffer)
+
+
+def write_run(path, values, codec, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Writes the values to a binary file in blocks of buffer_size bytes.
+    :param path:
+    :param values: iterable of values
+    :param codec:
+    :param buffer_size:
+    :return:
+    """
+    block_records = max(1, buffer_size // codec.size)
+    block = []
+    with open(path, "wb") as f:
+        for value in values:
+            block.append(value)
+            if len(block) == block_records:
+                f.write(codec.pack_many(block))
+                block = []
+        if block:
+            f.write(codec.pack_many(block))
+    return
+
+
+def merge_runs(runs, codec, buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False):
+    """
+    Returns a generator that performs the k-way merge of the runs with
+    sorting.merge_sorted, a min heap holding the current head of every
+    run. Ties are resolved by the run order, so equal values keep their
+    input order.
+    :param runs: list of run file paths
+    :param codec:
+    :param buffer_size:
+    :param use_mmap:
+    :return:
+    """
+    readers = [read_run(path, codec, buffer_size, use_mmap) for path in runs]
+    return merge_sorted(*readers)
+
+
+def _merge_to_generator(runs, codec, buffer_size, use_mmap, work_dir):
+    """
+    Helper generator that yields the final merge and removes the
+    temporary runs once it is exhausted or closed.
+    :param runs:
+    :param codec:
+    :param buffer_size:
+    :param use_mmap:
+    :param work_dir:
+    :return:
+    """
+    try:
+        yield from merge_runs(runs, codec, buffer_size, use_mmap)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+###############################################################
+# Main Function
+###############################################################
+if __name__ == "__main__":
+    # perform a test
+    import random
+
+    codec = RecordCodec("<q")
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "input.bin")
+        with open(source, "wb") as f:
+            f.write(codec.pack_many([random.randint(-1000, 1000) for _ in range(10000)]))
+
+        result = list(ExternalSort(source, chunk_size=1000, fan_in=4))
+        print("Sorted = {0}".format(result == sorted(result)))
@@ -0,0 +1,410 @@
+"""
+This module provides array-backed heaps.
+    > Binary heap
+      A complete binary tree stored in a flat list: the children of
+      the element i are at 2 * i + 1 and 2 * i + 2 and its parent is
+      at (i - 1) // 2. In a min heap every parent is less than or equal
+      to its children, so the minimum is always at index 0.
+
+    > d-ary heap
+      The same layout with d children per element: the children of i
+      are at d * i + 1 ... d * i + d and its parent is at (i - 1) // d.
+      A wider heap is shallower, so sift-up (push, decrease-key) does
+      fewer steps and the children of an element sit next to each other
+      in memory. Sift-down (pop) compares more children per level.
+
+    Complexity:
+    ----------------------------------------------------------------------------
+    Operation         | Binary heap   | d-ary heap
+    ----------------------------------------------------------------------------
+    heapify           | O(n)          | O(n)
+    push              | O(lg(n))      | O(log_d(n))
+    pop               | O(lg(n))      | O(d * log_d(n))
+    peek              | O(1)          | O(1)
+    decrease key      | O(lg(n))      | O(log_d(n))
+
+    Heap sort builds a max heap in place and repeatedly moves the
+    maximum to the end of the array: O(n * lg(n)), O(1) extra space,
+    not stable.
+"""
+
+
+###############################################################
+# Min Heap Helpers                                            #
+###############################################################
+def heapify(data, d=2):
+    """
+    Turns the list into a min heap in place. Sifting down every
+    internal element from the last one to the root costs O(n).
+    :param data:
+    :param d: number of children per element
+    :return:
+    """
+    n = len(data)
+    for idx in range((n - 2) // d, -1, -1):
+        sift_down(data, idx, d)
+    return
+
+
+def heap_push(heap, item, d=2):
+    """
+    Pushes the item onto the min heap.
+    :param heap:
+    :param item:
+    :param d: number of children per element
+    :return:
+    """
+    heap.append(item)
+    sift_up(heap, len(heap) - 1, d)
+    return
+
+
+def heap_pop(heap, d=2):
+    """
+    Pops and returns the smallest item of the min heap.
+    :param heap:
+    :param d: number of children per element
+    :return:
+    """
+    last = heap.pop()
+    if not heap:
+        return last
+
+    top = heap[0]
+    heap[0] = last
+    sift_down(heap, 0, d)
+    return top
+
+
+def heap_replace(heap, item, d=2):
+    """
+    Pops the smallest item and pushes the new one in a single
+    sift-down. This is the step of a bounded (top-k) heap.
+    :param heap:
+    :param item:
+    :param d: number of children per element
+    :return: the popped item
+    """
+    top = heap[0]
+    heap[0] = item
+    sift_down(heap, 0, d)
+    return top
+
+
+def sift_up(heap, idx, d=2):
+    """
+    Helper function that moves the element at idx up the min heap
+    until its parent is not greater than it.
+    :param heap:
+    :param idx:
+    :param d:
+    :return:
+    """
+    val = heap[idx]
+    while idx > 0:
+        parent = (idx - 1) // d
+        if not val < heap[parent]:
+            break
+        heap[idx] = heap[parent]
+        idx = parent
+    heap[idx] = val
+    return
+
+
+def sift_down(heap, idx, d=2):
+    """
+    Helper function that moves the element at idx down the min heap
+    until none of its children is less than it.
+    :param heap:
+    :param idx:
+    :param d:
+    :return:
+    """
+    n = len(heap)
+    val = heap[idx]
+    while True:
+        first = d * idx + 1
+        if first >= n:
+            break
+
+        # Find the smallest child
+        child = first
+        for c in range(first + 1, min(first + d, n)):
+            if heap[c] < heap[child]:
+                child = c
+
+        if not heap[child] < val:
+            break
+        heap[idx] = heap[child]
+        idx = child
+    heap[idx] = val
+    return
+
+
+###############################################################
+# Heap Sort Method                                            #
+###############################################################
+def HeapSort(data, lo=0, hi=None, d=2):
+    """
+    In-place heap sort of data[lo:hi]. A max heap is built bottom-up
+    in O(n) and the maximum is repeatedly swapped to the end of the
+    shrinking heap.
+    :param data:
+    :param lo: first index of the range to sort
+    :param hi: end (exclusive) of the range, defaults to len(data)
+    :param d: number of children per element
+    :return: the sorted data
+    """
+    if hi is None:
+        hi = len(data)
+    n = hi - lo
+
+    # Build a max heap bottom-up
+    for root in range((n - 2) // d, -1, -1):
+        _sift_down_max(data, lo, root, n, d)
+
+    # Move the max to the end and restore the heap
+    for end in range(n - 1, 0, -1):
+        data[lo], data[lo + end] = data[lo + end], data[lo]
+        _sift_down_max(data, lo, 0, end, d)
+
+    return data
+
+
+def _sift_down_max(data, offset, root, size, d):
+    """
+    Helper function that sifts the element at the root down the
+    max heap stored in data[offset:offset + size].
+    :param data:
+    :param offset:
+    :param root:
+    :param size:
+    :param d:
+    :return:
+    """
+    val = data[offset + root]
+    while True:
+        first = d * root + 1
+        if first >= size:
+            break
+
+        # Find the largest child
+        child = first
+        for c in range(first + 1, min(first + d, size)):
+            if data[offset + child] < data[offset + c]:
+                child = c
+
+        if not val < data[offset + child]:
+            break
+        data[offset + root] = data[offset + child]
+        root = child
+    data[offset + root] = val
+    return
+
+
+###############################################################
+# Indexed Priority Queue                                      #
+###############################################################
+class IndexedPriorityQueue:
+    """
+    This class describes a min priority queue of unique, hashable items.
+    The priorities and the items are kept in two parallel flat lists
+    ordered as a d-ary heap, and a dictionary maps every item to its
+    position in the heap, which makes decrease-key O(log_d(n)) without
+    allocating a node object per element.
+    """
+    def __init__(self, d=2):
+        if d < 2:
+            raise ValueError("A heap needs at least two children per element")
+        self.d = d
+        self.priorities = []
+        self.items = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __str__(self):
+        return str(list(zip(self.items, self.priorities)))
+
+    def get_priority(self, item):
+        """
+        Returns the current priority of the item.
+        :param item:
+        :return:
+        """
+        return self.priorities[self.positions[item]]
+
+    def push(self, item, priority):
+        """
+        Adds the item with the given priority to the queue.
+        :param item:
+        :param priority:
+        :return:
+        """
+        if item in self.positions:
+            raise KeyError("Item {0} is already in the queue".format(item))
+
+        self.priorities.append(priority)
+        self.items.append(item)
+        idx = len(self.items) - 1
+        self.positions[item] = idx
+        self._sift_up(idx)
+        return
+
+    def peek(self):
+        """
+        Returns the (item, priority) pair with the lowest priority
+        without removing it.
+        :return:
+        """
+        if not self.items:
+            raise IndexError("peek from an empty priority queue")
+        return self.items[0], self.priorities[0]
+
+    def pop(self):
+        """
+        Removes and returns the (item, priority) pair with the lowest
+        priority.
+        :return:
+        """
+        if not self.items:
+            raise IndexError("pop from an empty priority queue")
+
+        item = self.items[0]
+        priority = self.priorities[0]
+        del self.positions[item]
+
+        last_item = self.items.pop()
+        last_priority = self.priorities.pop()
+        if self.items:
+            self.items[0] = last_item
+            self.priorities[0] = last_priority
+            self.positions[last_item] = 0
+            self._sift_down(0)
+
+        return item, priority
+
+    def decrease_key(self, item, priority):
+        """
+        Lowers the priority of an item that is already in the queue.
+        :param item:
+        :param priority: new priority, must not be greater than the current one
+        :return:
+        """
+        idx = self.positions[item]
+        if self.priorities[idx] < priority:
+            raise ValueError("New priority {0} is greater than the current one".format(priority))
+
+        self.priorities[idx] = priority
+        self._sift_up(idx)
+        return
+
+    def heapify(self, pairs):
+        """
+        Replaces the content of the queue with the (item, priority)
+        pairs and builds the heap bottom-up in O(n).
+        :param pairs:
+        :return:
+        """
+        items = []
+        priorities = []
+        for item, priority in pairs:
+            items.append(item)
+            priorities.append(priority)
+
+        positions = {item: idx for idx, item in enumerate(items)}
+        if len(positions) != len(items):
+            raise KeyError("Items of the priority queue must be unique")
+
+        self.items = items
+        self.priorities = priorities
+        self.positions = positions
+        for idx in range((len(items) - 2) // self.d, -1, -1):
+            self._sift_down(idx)
+        return
+
+    def _sift_up(self, idx):
+        """
+        Helper method that moves the entry at idx up the heap.
+        :param idx:
+        :return:
+        """
+        d = self.d
+        priorities = self.priorities
+        items = self.items
+        positions = self.positions
+
+        priority = priorities[idx]
+        item = items[idx]
+        while idx > 0:
+            parent = (idx - 1) // d
+            if not priority < priorities[parent]:
+                break
+            priorities[idx] = priorities[parent]
+            items[idx] = items[parent]
+            positions[items[idx]] = idx
+            idx = parent
+
+        priorities[idx] = priority
+        items[idx] = item
+        positions[item] = idx
+        return
+
+    def _sift_down(self, idx):
+        """
+        Helper method that moves the entry at idx down the heap.
+        :param idx:
+        :return:
+        """
+        d = self.d
+        priorities = self.priorities
+        items = self.items
+        positions = self.positions
+        n = len(items)
+
+        priority = priorities[idx]
+        item = items[idx]
+        while True:
+            first = d * idx + 1
+            if first >= n:
+                break
+
+            # Find the child with the lowest priority
+            child = first
+            for c in range(first + 1, min(first + d, n)):
+                if priorities[c] < priorities[child]:
+                    child = c
+
+            if not priorities[child] < priority:
+                break
+            priorities[idx] = priorities[child]
+            items[idx] = items[child]
+            positions[items[idx]] = idx
+            idx = child
+
+        priorities[idx] = priority
+        items[idx] = item
+        positions[item] = idx
+        return
+
+
+###############################################################
+# Main Function
+###############################################################
+if __name__ == "__main__":
+    # perform a test
+    data_array = [1, 5, -5, 7, 12, 35, 3, -20, 7]
+
+    print("Input Data = {0}".format(data_array))
+    HeapSort(data_array)
+    print("Sorted Data = {0}".format(data_array))
+
+    queue = IndexedPriorityQueue(d=4)
+    queue.heapify([("a", 5), ("b", 3), ("c", 8), ("d", 1)])
+    queue.decrease_key("c", 0)
+    while len(queue):
+        print(queue.pop())
@@ -0,0 +1,368 @@
+"""
+This module provides a benchmark harness for the sorting algorithms.
+    Every algorithm is run over a grid of input sizes and distributions:
+        > random        - uniformly random values
+        > sorted        - already sorted
+        > reversed      - sorted in reverse order
+        > sawtooth      - repeated ascending runs
+        > organ_pipe    - ascending then descending
+        > few_unique    - only a handful of distinct keys
+        > nearly_sorted - sorted with k random swaps
+        > killer        - adversarial input built against the algorithm
+                          itself with McIlroy's "antiqsort" adversary
+
+    For every run the harness reports the best wall time of a few
+    repeats, the peak memory measured with tracemalloc and the number
+    of comparisons counted with sorting.SortProfiler. The results can
+    be saved as a JSON baseline and a later run compared against it:
+    a run is flagged as a regression when it is slower than the
+    baseline by more than the threshold or does more comparisons.
+
+    Usage:
+        python sortbench.py --sizes 10 1000 100000 --save baseline.json
+        python sortbench.py --sizes 10 1000 100000 --baseline baseline.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import sorting
+from heaps import HeapSort
+
+# Sizes of the default benchmark grid
+SIZES = [10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+# Largest input given to the O(n^2) algorithms
+QUADRATIC_MAX_SIZE = 10 ** 4
+# Largest input given to the pure Python O(n * lg(n)) algorithms
+PYTHON_MAX_SIZE = 10 ** 6
+# Largest input whose comparisons are counted (counting is slow)
+COUNT_MAX_SIZE = 10 ** 5
+# Largest input for which the adversarial killer is generated
+KILLER_MAX_SIZE = 10 ** 4
+# Relative slowdown that is reported as a regression
+REGRESSION_THRESHOLD = 0.25
+# Runs faster than this are too noisy to flag
+MIN_REGRESSION_TIME = 1e-3
+
+
+###############################################################
+# Input Distributions                                         #
+###############################################################
+def random_data(n, rng, sort_func=None):
+    return [rng.random() for _ in range(n)]
+
+
+def sorted_data(n, rng, sort_func=None):
+    return list(range(n))
+
+
+def reversed_data(n, rng, sort_func=None):
+    return list(range(n, 0, -1))
+
+
+def sawtooth_data(n, rng, sort_func=None):
+    tooth = max(1, int(n ** 0.5))
+    return [i % tooth for i in range(n)]
+
+
+def organ_pipe_data(n, rng, sort_func=None):
+    half = n // 2
+    return list(range(half)) + list(range(n - half, 0, -1))
+
+
+def few_unique_data(n, rng, sort_func=None):
+    return [rng.randrange(8) for _ in range(n)]
+
+
+def nearly_sorted_data(n, rng, sort_func=None, swaps=None):
+    """
+    Sorted data with k random swaps, by default k = n / 100 + 1.
+    """
+    data = list(range(n))
+    if n < 2:
+        return data
+
+    for _ in range(n // 100 + 1 if swaps is None else swaps):
+        i = rng.randrange(n)
+        j = rng.randrange(n)
+        data[i], data[j] = data[j], data[i]
+    return data
+
+
+def killer_data(n, rng, sort_func=None):
+    """
+    McIlroy's adversary ("A Killer Adversary for Quicksort"): the sort
+    runs on items whose values are decided lazily during comparisons.
+    Items start as "gas" (larger than every value); when two gas items
+    are compared one of them is frozen to the next smallest value,
+    preferring the item that looks like the current pivot candidate.
+    The frozen values form an input on which that algorithm does as
+    many comparisons as the adversary can force.
+    :param n:
+    :param rng:
+    :param sort_func: algorithm the input is built against
+    :return:
+    """
+    if sort_func is None:
+        sort_func = sorting.QuickSort3Way
+
+    gas = n
+    values = [gas] * n
+    state = {"solid": 0, "candidate": 0}
+
+    def freeze(i):
+        values[i] = state["solid"]
+        state["solid"] += 1
+
+    class Adversary:
+        __slots__ = ("index",)
+
+        def __init__(self, index):
+            self.index = index
+
+        def compare(self, other):
+            x = self.index
+            y = other.index
+            if values[x] == gas and values[y] == gas:
+                freeze(x if x == state["candidate"] else y)
+            if values[x] == gas:
+                state["candidate"] = x
+            elif values[y] == gas:
+                state["candidate"] = y
+            return values[x] - values[y]
+
+        def __lt__(self, other):
+            return self.compare(other) < 0
+
+        def __gt__(self, other):
+            return self.compare(other) > 0
+
+        def __le__(self, other):
+            return self.compare(other) <= 0
+
+        def __ge__(self, other):
+            return self.compare(other) >= 0
+
+    sort_func([Adversary(i) for i in range(n)])
+    return values
+
+
+DISTRIBUTIONS = {
+    "random": random_data,
+    "sorted": sorted_data,
+    "reversed": reversed_data,
+    "sawtooth": sawtooth_data,
+    "organ_pipe": organ_pipe_data,
+    "few_unique": few_unique_data,
+    "nearly_sorted": nearly_sorted_data,
+    "killer": killer_data,
+}
+
+
+###############################################################
+# Algorithms                                                  #
+###############################################################
+def _selection_sort(data):
+    sorting.SelectionSortIterative(data, 0)
+    return data
+
+
+# name -> (sort function, largest size, comparisons can be counted)
+ALGORITHMS = {
+    "SelectionSort": (_selection_sort, QUADRATIC_MAX_SIZE, True),
+    "InsertionSort": (sorting.InsertionSort, QUADRATIC_MAX_SIZE, True),
+    "QuickSortSimple": (sorting.QuickSortSimple, PYTHON_MAX_SIZE, True),
+    "QuickSort3Way": (sorting.QuickSort3Way, PYTHON_MAX_SIZE, True),
+    "MergeSortSimple": (sorting.MergeSortSimple, PYTHON_MAX_SIZE, True),
+    "MergeSortBottomUp": (sorting.MergeSortBottomUp, PYTHON_MAX_SIZE, True),
+    "TimSort": (sorting.TimSort, PYTHON_MAX_SIZE, True),
+    "ShellSort": (sorting.ShellSort, PYTHON_MAX_SIZE, True),
+    "HeapSort": (HeapSort, PYTHON_MAX_SIZE, True),
+    "sort": (sorting.sort, PYTHON_MAX_SIZE, True),
+}
+if sorting.np is not None:
+    ALGORITHMS["RadixSort"] = (sorting.RadixSort, max(SIZES), False)
+
+
+###############################################################
+# Benchmark                                                   #
+###############################################################
+def measure(sort_func, data, repeat=3, count=True, track_memory=True):
+    """
+    Measures a single algorithm on a single input.
+    :param sort_func:
+    :param data: input, it is copied for every run
+    :param repeat: number of timed runs, the best one is reported
+    :param count: count the comparisons with an extra profiled run
+    :param track_memory: measure the peak memory with an extra run
+    :return: dict with time, peak_memory and comparisons
+    """
+    best = None
+    for _ in range(repeat):
+        copy = list(data)
+        start = time.perf_counter()
+        sort_func(copy)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak_memory = None
+    if track_memory:
+        copy = list(data)
+        tracemalloc.start()
+        try:
+            sort_func(copy)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    comparisons = None
+    if count:
+        with sorting.SortProfiler() as profiler:
+            profiler.run(sort_func, list(data), name="run")
+        comparisons = profiler.stats["run"].comparisons
+
+    return {"time": best, "peak_memory": peak_memory, "comparisons": comparisons}
+
+
+def run_benchmarks(algorithms=None, distributions=None, sizes=None, repeat=3,
+                   seed=0, track_memory=True, report=None):
+    """
+    Runs the benchmark grid.
+    :param algorithms: names from ALGORITHMS, defaults to all
+    :param distributions: names from DISTRIBUTIONS, defaults to all
+    :param sizes: input sizes, defaults to SIZES
+    :param repeat: timed runs per measurement
+    :param seed: seed of the input generators
+    :param track_memory: measure peak memory
+    :param report: optional callback called with every result
+    :return: list of result dicts
+    """
+    results = []
+    for name in algorithms or ALGORITHMS:
+        sort_func, max_size, countable = ALGORITHMS[name]
+        for distribution in distributions or DISTRIBUTIONS:
+            generate = DISTRIBUTIONS[distribution]
+            for n in sizes or SIZES:
+                if n > max_size:
+                    continue
+                if distribution == "killer" and (n > KILLER_MAX_SIZE or not countable):
+                    continue
+
+                result = {"algorithm": name, "distribution": distribution, "size": n}
+                try:
+                    data = generate(n, random.Random(seed), sort_func)
+                    result.update(measure(sort_func, data, repeat,
+                                          countable and n <= COUNT_MAX_SIZE, track_memory))
+                except RecursionError:
+                    # Deep recursion on this input is a result, not a crash
+                    result.update({"time": None, "peak_memory": None, "comparisons": None,
+                                   "error": "RecursionError"})
+                results.append(result)
+                if report is not None:
+                    report(result)
+
+    return results
+
+
+def save_baseline(path, results):
+    """
+    Saves the results as a JSON baseline.
+    :param path:
+    :param results:
+    :return:
+    """
+    with open(path, "w") as f:
+        json.dump({"python": sys.version, "results": results}, f, indent=2)
+    return
+
+
+def load_baseline(path):
+    """
+    Loads a JSON baseline saved by save_baseline.
+    :param path:
+    :return: list of result dicts
+    """
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def find_regressions(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares the results against the baseline.
+    :param results:
+    :param baseline:
+    :param threshold: relative slowdown that counts as a regression
+    :return: list of (result, baseline result, reason) tuples
+    """
+    previous = {(r["algorithm"], r["distribution"], r["size"]): r for r in baseline}
+
+    regressions = []
+    for result in results:
+        old = previous.get((result["algorithm"], result["distribution"], result["size"]))
+        if old is None:
+            continue
+
+        if result["time"] is None or old["time"] is None:
+            if result.get("error") and not old.get("error"):
+                regressions.append((result, old, result["error"]))
+            continue
+
+        if result["time"] > max(old["time"], MIN_REGRESSION_TIME) * (1 + threshold):
+            regressions.append((result, old, "time {0:.6f}s -> {1:.6f}s".format(
+                old["time"], result["time"])))
+        if old.get("comparisons") is not None and result.get("comparisons") is not None \
+                and result["comparisons"] > old["comparisons"]:
+            regressions.append((result, old, "comparisons {0} -> {1}".format(
+                old["comparisons"], result["comparisons"])))
+
+    return regressions
+
+
+def format_result(result):
+    line = "{algorithm:<18} {distribution:<14} {size:>9}".format(**result)
+    if result.get("error"):
+        return "{0}  {1}".format(line, result["error"])
+    return "{0}  {1:>10.6f}s  {2!s:>10}B  {3!s:>11} cmp".format(
+        line, result["time"], result["peak_memory"], result["comparisons"])
+
+
+###############################################################
+# Main Function
+###############################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sorting algorithms.")
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(ALGORITHMS))
+    parser.add_argument("--distributions", nargs="+", choices=sorted(DISTRIBUTIONS))
+    parser.add_argument("--sizes", nargs="+", type=int)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--save", help="save the results as a JSON baseline")
+    parser.add_argument("--baseline", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.algorithms, args.distributions, args.sizes, args.repeat,
+                             args.seed, not args.no_memory,
+                             report=lambda result: print(format_result(result)))
+
+    if args.save:
+        save_baseline(args.save, results)
+
+    if args.baseline:
+        regressions = find_regressions(results, load_baseline(args.baseline), args.threshold)
+        for result, _, reason in regressions:
+            print("REGRESSION {0} {1} {2}: {3}".format(
+                result["algorithm"], result["distribution"], result["size"], reason))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+"""
+This module provides a sorted container that stays ordered while values
+are added and removed.
+    > Sorted list
+      The values are stored in a list of sorted blocks. Every block holds
+      between LOAD / 2 and 2 * LOAD values, and a parallel list keeps the
+      maximum of every block, so a value is located with two binary
+      searches: one over the block maxima and one inside the block.
+      Inserting into or deleting from a block shifts at most 2 * LOAD
+      references, which is a fast memmove for a plain Python list.
+
+      A positional index (a Fenwick tree over the block lengths) turns a
+      (block, offset) location into a rank and back in O(lg(blocks)).
+      It is rebuilt lazily after blocks are split or merged, so a run of
+      adds never pays for it.
+
+    Complexity:
+    ----------------------------------------------------------------------------
+    Operation           | Time
+    ----------------------------------------------------------------------------
+    add / remove        | O(lg(n)) amortized
+    bisect / contains   | O(lg(n))
+    index by rank       | O(lg(n))
+    irange              | O(lg(n) + k)
+    update with m values| O(m * lg(n)), or O((n + m) * lg(n + m)) for large m
+
+    Compared to keeping a list sorted with repeated InsertionSort calls
+    this is O(lg(n)) per add instead of O(n), and compared to a
+    BinarySearchTree there is no node object per value: the overhead is
+    one list slot per value plus a few slots per block.
+"""
+
+import bisect
+import itertools
+
+from sorting import TimSort
+
+# Target block size, blocks are split above 2 * LOAD values
+DEFAULT_LOAD = 1000
+
+
+class SortedList:
+    """
+    This class describes a list that keeps its values in ascending order.
+    Equal values are kept in insertion order.
+    """
+    def __init__(self, iterable=None, load=DEFAULT_LOAD):
+        if load < 4:
+            raise ValueError("load must be at least 4")
+        self.load = load
+        self._len = 0
+        self._blocks = []
+        self._maxes = []
+        self._index = None
+        if iterable is not None:
+            self.update(iterable)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._blocks)
+
+    def __reversed__(self):
+        return itertools.chain.from_iterable(reversed(block) for block in reversed(self._blocks))
+
+    def __contains__(self, value):
+        pos = bisect.bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        block = self._blocks[pos]
+        idx = bisect.bisect_left(block, value)
+        return block[idx] == value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step == 1:
+                return list(self.islice(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+
+        pos, idx = self._locate_index(index)
+        return self._blocks[pos][idx]
+
+    def __delitem__(self, index):
+        pos, idx = self._locate_index(index)
+        self._delete(pos, idx)
+        return
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, list(self))
+
+    def clear(self):
+        """
+        Removes all the values.
+        :return:
+        """
+        self._len = 0
+        self._blocks = []
+        self._maxes = []
+        self._index = None
+        return
+
+    def add(self, value):
+        """
+        Adds the value after any equal values already in the list.
+        :param value:
+        :return:
+        """
+        blocks = self._blocks
+        maxes = self._maxes
+
+        if not blocks:
+            blocks.append([value])
+            maxes.append(value)
+            self._index = None
+            self._len = 1
+            return
+
+        pos = bisect.bisect_right(maxes, value)
+        if pos == len(maxes):
+            pos -= 1
+            blocks[pos].append(value)
+            maxes[pos] = value
+        else:
+            bisect.insort_right(blocks[pos], value)
+
+        self._len += 1
+        if self._index is not None:
+            self._index_add(pos, 1)
+        if len(blocks[pos]) > 2 * self.load:
+            self._split(pos)
+        return
+
+    def update(self, iterable):
+        """
+        Adds all the values. A batch that is large compared to the list
+        is merged in with one sort and the blocks are rebuilt; a small
+        batch is added value by value.
+        :param iterable:
+        :return:
+        """
+        values = list(iterable)
+        if not values:
+            return
+
+        if len(values) * 4 >= self._len:
+            # The sort is stable and the old values come first, so equal
+            # values keep their insertion order
+            values = list(self) + values
+            TimSort(values)
+            self._build(values)
+        else:
+            for value in values:
+                self.add(value)
+        return
+
+    def discard(self, value):
+        """
+        Removes the first occurrence of the value if it is present.
+        :param value:
+        :return: True if a value was removed
+        """
+        pos = bisect.bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        block = self._blocks[pos]
+        idx = bisect.bisect_left(block, value)
+        if block[idx] != value:
+            return False
+        self._delete(pos, idx)
+        return True
+
+    def remove(self, value):
+        """
+        Removes the first occurrence of the value.
+        :param value:
+        :return:
+        """
+        if not self.discard(value):
+            raise ValueError("{0!r} is not in list".format(value))
+        return
+
+    def pop(self, index=-1):
+        """
+        Removes and returns the value at the given rank.
+        :param index:
+        :return:
+        """
+        if not self._len:
+            raise IndexError("pop from an empty list")
+        pos, idx = self._locate_index(index)
+        value = self._blocks[pos][idx]
+        self._delete(pos, idx)
+        return value
+
+    def bisect_left(self, value):
+        """
+        Returns the rank at which the value would be inserted before any
+        equal values.
+        :param value:
+        :return:
+        """
+        pos = bisect.bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._rank(pos, bisect.bisect_left(self._blocks[pos], value))
+
+    def bisect_right(self, value):
+        """
+        Returns the rank at which the value would be inserted after any
+        equal values.
+        :param value:
+        :return:
+        """
+        pos = bisect.bisect_right(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._rank(pos, bisect.bisect_right(self._blocks[pos], value))
+
+    bisect = bisect_right
+
+    def index(self, value):
+        """
+        Returns the rank of the first occurrence of the value.
+        :param value:
+        :return:
+        """
+        rank = self.bisect_left(value)
+        if rank == self._len or self[rank] != value:
+            raise ValueError("{0!r} is not in list".format(value))
+        return rank
+
+    def count(self, value):
+        """
+        Returns the number of occurrences of the value.
+        :param value:
+        :return:
+        """
+        return self.bisect_right(value) - self.bisect_left(value)
+
+    def islice(self, start=None, stop=None, reverse=False):
+        """
+        Returns an iterator over the values with ranks in [start, stop).
+        :param start:
+        :param stop:
+        :param reverse: iterate from stop - 1 down to start
+        :return:
+        """
+        start, stop, _ = slice(start, stop).indices(self._len)
+        if start >= stop:
+            return iter(())
+        start_pos, start_idx = self._locate_index(start)
+        stop_pos, stop_idx = self._locate_index(stop - 1)
+        return self._iter_range(start_pos, start_idx, stop_pos, stop_idx + 1, reverse)
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True), reverse=False):
+        """
+        Returns an iterator over the values between minimum and maximum.
+        :param minimum: lower bound, None for no bound
+        :param maximum: upper bound, None for no bound
+        :param inclusive: pair of flags, whether the bounds are included
+        :param reverse: iterate from the largest value down
+        :return:
+        """
+        blocks = self._blocks
+        maxes = self._maxes
+        if not blocks:
+            return iter(())
+
+        if minimum is None:
+            start_pos, start_idx = 0, 0
+        else:
+            search = bisect.bisect_left if inclusive[0] else bisect.bisect_right
+            start_pos = search(maxes, minimum)
+            if start_pos == len(maxes):
+                return iter(())
+            start_idx = search(blocks[start_pos], minimum)
+
+        if maximum is None:
+            stop_pos, stop_idx = len(blocks) - 1, len(blocks[-1])
+        else:
+            search = bisect.bisect_right if inclusive[1] else bisect.bisect_left
+            stop_pos = search(maxes, maximum)
+            if stop_pos == len(maxes):
+                stop_pos, stop_idx = len(blocks) - 1, len(blocks[-1])
+            else:
+                stop_idx = search(blocks[stop_pos], maximum)
+
+        if (start_pos, start_idx) >= (stop_pos, stop_idx):
+            return iter(())
+        return self._iter_range(start_pos, start_idx, stop_pos, stop_idx, reverse)
+
+    def _iter_range(self, start_pos, start_idx, stop_pos, stop_idx, reverse):
+        """
+        Helper method that iterates from (start_pos, start_idx) to the
+        exclusive location (stop_pos, stop_idx).
+        :param start_pos:
+        :param start_idx:
+        :param stop_pos:
+        :param stop_idx:
+        :param reverse:
+        :return:
+        """
+        blocks = self._blocks
+        if start_pos == stop_pos:
+            parts = [blocks[start_pos][start_idx:stop_idx]]
+        else:
+            parts = [itertools.islice(blocks[start_pos], start_idx, None)]
+            parts.extend(blocks[start_pos + 1:stop_pos])
+            parts.append(itertools.islice(blocks[stop_pos], stop_idx))
+        if reverse:
+            parts = [reversed(list(part)) for part in reversed(parts)]
+        return itertools.chain.from_iterable(parts)
+
+    def _build(self, values):
+        """
+        Helper method that replaces the content with the sorted values,
+        cut into blocks of LOAD values.
+        :param values:
+        :return:
+        """
+        load = self.load
+        self._blocks = [values[start:start + load] for start in range(0, len(values), load)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(values)
+        self._index = None
+        return
+
+    def _split(self, pos):
+        """
+        Helper method that splits an oversized block in two halves.
+        :param pos:
+        :return:
+        """
+        block = self._blocks[pos]
+        half = len(block) >> 1
+        self._blocks.insert(pos + 1, block[half:])
+        del block[half:]
+        self._maxes.insert(pos, block[-1])
+        self._index = None
+        return
+
+    def _delete(self, pos, idx):
+        """
+        Helper method that deletes the value at blocks[pos][idx] and
+        merges the block into a neighbour when it gets too small.
+        :param pos:
+        :param idx:
+        :return:
+        """
+        blocks = self._blocks
+        maxes = self._maxes
+        block = blocks[pos]
+        del block[idx]
+        self._len -= 1
+
+        if len(block) >= self.load >> 1:
+            maxes[pos] = block[-1]
+            if self._index is not None:
+                self._index_add(pos, -1)
+        elif len(blocks) > 1:
+            # Join with the previous block (or the next one for the first
+            # block) and split again if the result is too large
+            if pos == 0:
+                pos = 1
+            blocks[pos - 1].extend(blocks[pos])
+            maxes[pos - 1] = blocks[pos - 1][-1]
+            del blocks[pos]
+            del maxes[pos]
+            self._index = None
+            if len(blocks[pos - 1]) > 2 * self.load:
+                self._split(pos - 1)
+        elif block:
+            maxes[pos] = block[-1]
+            if self._index is not None:
+                self._index_add(pos, -1)
+        else:
+            del blocks[pos]
+            del maxes[pos]
+            self._index = None
+        return
+
+    def _build_index(self):
+        """
+        Helper method that builds the Fenwick tree over the block
+        lengths in O(blocks): tree[i] holds the total length of the
+        blocks in (i - (i & -i), i], 1-based.
+        :return:
+        """
+        tree = [0]
+        tree.extend(len(block) for block in self._blocks)
+        size = len(tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                tree[parent] += tree[i]
+        self._index = tree
+        return tree
+
+    def _index_add(self, pos, delta):
+        """
+        Helper method that adds delta to the length of block pos.
+        :param pos:
+        :param delta:
+        :return:
+        """
+        tree = self._index
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+        return
+
+    def _rank(self, pos, idx):
+        """
+        Helper method that converts a (block, offset) location to a rank.
+        :param pos:
+        :param idx:
+        :return:
+        """
+        tree = self._index if self._index is not None else self._build_index()
+        rank = idx
+        i = pos
+        while i > 0:
+            rank += tree[i]
+            i -= i & -i
+        return rank
+
+    def _locate_index(self, index):
+        """
+        Helper method that converts a rank (negative ranks count from
+        the end) to a (block, offset) location.
+        :param index:
+        :return:
+        """
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("list index out of range")
+
+        # The first and the last block are common and need no index
+        first = len(self._blocks[0])
+        if index < first:
+            return 0, index
+        last = len(self._blocks[-1])
+        if index >= self._len - last:
+            return len(self._blocks) - 1, index - (self._len - last)
+
+        # Descend the Fenwick tree from the highest power of two
+        tree = self._index if self._index is not None else self._build_index()
+        pos = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] <= index:
+                index -= tree[nxt]
+                pos = nxt
+            step >>= 1
+        return pos, index
+
+
+###############################################################
+# Main Function
+###############################################################
+if __name__ == "__main__":
+    # perform a test
+    import random
+
+    values = SortedList(load=8)
+    for _ in range(100):
+        values.add(random.randint(0, 50))
+
+    print("Values = {0}".format(list(values)))
+    print("Sorted = {0}".format(list(values) == sorted(values)))
+    print("Median = {0}".format(values[len(values) // 2]))
+    print("10 <= x < 20 = {0}".format(list(values.irange(10, 20, inclusive=(True, False)))))
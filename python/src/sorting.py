@@ -22,17 +22,60 @@ This module provides different sorting algorithms APIs.
         - best case is if pivot value is chosen such that it splits
           array into two nearly equal subsets.
         - most implementation of the quicksort are unstable
+        - the 3-way variant (Quick 3) splits the range into
+          less / equal / greater parts in place, so runs of equal
+          keys are finished in a single pass.
 
     > Merge Sort
         - Another divide-and-conquer algorithm that works by splitting a
           data set into two or more subsets, sorting the subsets and
           then merging them together into final sorted set.
+        - sorted sequences are merged lazily with merge_sorted: a min
+          heap holds the current head of every sequence, so k sorted
+          streams are merged in O(n * lg(k)) time and O(k) memory.
+        - the bottom-up variant is iterative: it merges runs of
+          doubling width back and forth between the data and a single
+          auxiliary buffer, so it needs exactly n extra slots.
+        - the natural variant (Timsort) merges the ascending and
+          descending runs already present in the data and switches to
+          galloping when one run keeps winning, so nearly sorted data
+          is sorted in close to O(n).
+
+    > Introsort - worst case O(n * log(n))
+        - hybrid of quicksort, heap sort and insertion sort.
+        - partitions with quicksort, finishes small ranges with
+          insertion sort and switches to heap sort when the recursion
+          depth exceeds 2 * lg(n), so adversarial input can't push it
+          into O(n^2) or past the recursion limit.
+        - not stable
+
+    > LSD Radix sort - O(w * n) for keys of w digits
+        - not a comparison sort: the keys are mapped to unsigned
+          integers with the same order and distributed by one digit
+          at a time, starting with the least significant digit.
+        - every digit pass is a stable counting sort, so the whole
+          sort is stable.
+
+    > Parallel sample sort - O(n * lg(n) / p) per core
+        - picks p - 1 splitters from an oversampled random sample,
+          distributes the data into p buckets so that every bucket
+          only holds keys between two splitters and sorts the buckets
+          on p cores independently. The concatenation is sorted.
+
+    > Sorting networks - fixed sequence of compare-exchange operations
+        - the comparisons don't depend on the data, so the same network
+          can be applied to many arrays at once with vectorized min/max.
+        - best known networks are used up to 16 elements, Batcher's
+          odd-even merge sort networks above that.
 
     > Shell - best case O(n^(3/2)), worst - O(n^(4/3)) or O(n*lg^2(n))
         - Because shell sort is based on insertion sort, shell sort
           inherits insertion sort's adaptive properties. The adapation
           is not as dramatic because shell sort requires one pass through
           the data for each increment, but it is significant.
+        - the gaps are applied largest first and end with 1; the
+          Ciura, Tokuda, Sedgewick and e^(k-2) + 1 sequences are
+          available.
 
     The ideal sorting algorithm would have the following properties:
         > Stable: Equal keys aren't reordered.
@@ -54,14 +97,260 @@ This module provides different sorting algorithms APIs.
     6. Heap           | O(n*lg(n)) | Not Stable |    O(1)     |  Not really adaptive
     7. Quick          | O(n^2)     | Not stable |    O(lg(n)  |  Non-adaptive
     8. Quick 3        | O(n^2)     | Not stable |    O(lg(n)  |  Adaptive: O(n) time when O(1) unique keys
+    9. Introsort      | O(n*lg(n)) | Not stable |    O(lg(n)) |  General purpose
+    10. Timsort       | O(n*lg(n)) | Stable     |    O(n)     |  Adaptive: O(n) time when nearly sorted
+    11. LSD Radix     | O(w * n)   | Stable     |    O(n)     |  Large numeric arrays (needs numpy)
+    12. Sample sort   | O(n*lg(n)) | Stable     |    O(n)     |  Large numeric arrays on many cores
+    13. Network       | O(n*lg^2n) | Not stable |    O(1)     |  Many tiny arrays (rows) at once
+
+    Keys and reverse order:
+        The comparison sorts accept key= and reverse= like sorted().
+        Every key is computed exactly once and the records are
+        decorated as (key, position) pairs, so the algorithms compare
+        plain keys and the records themselves are never compared. The
+        position breaks ties, which makes the result stable for every
+        algorithm when a key or reverse is given.
+
+    Permutations:
+        argsort returns the stable permutation that sorts the data
+        instead of the sorted values, and lexsort the one that sorts
+        parallel columns lexicographically: one stable argsort pass per
+        column, least significant first, carrying the permutation
+        forward. gather applies a permutation to any number of columns,
+        so records spread over several columns are never turned into
+        row tuples.
+
+    Buffers:
+        The in-place sorts work on any mutable sequence, including
+        writable buffer-protocol objects such as array.array, memoryview,
+        mmap and numpy arrays, without copying them into a list first.
+        For typed numeric buffers sort() goes further and sorts a numpy
+        view of the memory, so the elements are never boxed into Python
+        objects (see as_typed_array).
+
+    Instrumentation:
+        SortProfiler measures comparisons, writes into the input list,
+        recursion depth, peak memory and wall time of the comparison
+        sorts. It wraps the data instead of the algorithms, so the
+        sorts run unchanged and cost nothing extra when they are not
+        profiled.
 """
 
+import bisect
+import functools
+import inspect
+import itertools
 import math
+import mmap
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from heaps import HeapSort, heap_pop, heap_push, heap_replace, heapify
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed by the vectorized backends
+    np = None
+
+# Ranges shorter than this are finished with insertion sort
+INSERTION_SORT_CUTOFF = 16
+
+
+###############################################################
+# Key Function Support                                        #
+###############################################################
+def key_sort(in_place=True):
+    """
+    Decorator that adds key= and reverse= arguments to a sort function
+    using decorate-sort-undecorate. Without a key or reverse the call
+    goes straight to the sort function. Otherwise the records (of the
+    lo:hi range, when the function takes one) are decorated as
+    (key, position) pairs, sorted, and gathered back by position.
+    Recursive and internal calls go to the undecorated function through
+    __wrapped__, so they don't add a wrapper frame to every level.
+    :param in_place: the function sorts its argument; otherwise it
+                     returns a new sorted list
+    :return:
+    """
+    def decorator(sort_func):
+        signature = inspect.signature(sort_func)
+        has_range = "lo" in signature.parameters and "hi" in signature.parameters
+
+        @functools.wraps(sort_func)
+        def wrapper(data, *args, key=None, reverse=False, **kwargs):
+            if key is None and not reverse:
+                return sort_func(data, *args, **kwargs)
+
+            bound = signature.bind(data, *args, **kwargs)
+            bound.apply_defaults()
+            lo, hi = 0, len(data)
+            if has_range:
+                lo = bound.arguments["lo"]
+                hi = len(data) if bound.arguments["hi"] is None else bound.arguments["hi"]
+
+            values = snapshot(data, lo, hi)
+            decorated = decorate(values, key, reverse)
+            bound.arguments["data"] = decorated
+            if has_range:
+                bound.arguments["lo"] = 0
+                bound.arguments["hi"] = len(decorated)
+            result = sort_func(*bound.args, **bound.kwargs)
+
+            if not in_place:
+                return undecorate(result, values, reverse)
+
+            sorted_values = undecorate(decorated, values, reverse)
+            copy_range(data, lo, sorted_values, 0, len(sorted_values))
+            return None if result is None else data
+
+        return wrapper
+    return decorator
+
+
+def decorate(values, key=None, reverse=False):
+    """
+    Helper function that pairs every key with the position of its
+    record. The position is negated for reverse order, so that after
+    an ascending sort and a reversal equal keys keep their order.
+    :param values:
+    :param key:
+    :param reverse:
+    :return: list of (key, position) pairs
+    """
+    keys = values if key is None else [key(value) for value in values]
+    if reverse:
+        return [(k, -i) for i, k in enumerate(keys)]
+    return [(k, i) for i, k in enumerate(keys)]
+
+
+def undecorate(decorated, values, reverse=False):
+    """
+    Helper function that gathers the records in the order of the
+    sorted (key, position) pairs.
+    :param decorated:
+    :param values:
+    :param reverse:
+    :return: list of records
+    """
+    if reverse:
+        return [values[-i] for _, i in reversed(decorated)]
+    return [values[i] for _, i in decorated]
+
+
+###############################################################
+# Buffer Support                                              #
+###############################################################
+def snapshot(data, lo, hi):
+    """
+    Helper function that returns a list copy of data[lo:hi]. Slices of
+    memoryviews and numpy arrays are views, so they can't be used as
+    temporary copies by the merge steps.
+    :param data:
+    :param lo:
+    :param hi:
+    :return:
+    """
+    if type(data) is list:
+        return data[lo:hi]
+    return list(data[lo:hi])
+
+
+def copy_range(dest, dest_lo, src, lo, hi):
+    """
+    Helper function that copies src[lo:hi] to dest[dest_lo:]. Lists and
+    buffers of the same type take a slice assignment (overlapping ranges
+    are fine); buffers such as array.array and memoryview don't accept
+    a list slice, so those are written element by element.
+    :param dest:
+    :param dest_lo:
+    :param src:
+    :param lo:
+    :param hi:
+    :return:
+    """
+    if type(dest) is list or type(dest) is type(src):
+        dest[dest_lo:dest_lo + hi - lo] = src[lo:hi]
+    else:
+        for offset in range(hi - lo):
+            dest[dest_lo + offset] = src[lo + offset]
+    return
+
+
+def reverse_range(data, lo, hi):
+    """
+    Helper function that reverses data[lo:hi] in place.
+    :param data:
+    :param lo:
+    :param hi:
+    :return:
+    """
+    if type(data) is list:
+        data[lo:hi] = data[lo:hi][::-1]
+        return
+
+    hi -= 1
+    while lo < hi:
+        data[lo], data[hi] = data[hi], data[lo]
+        lo += 1
+        hi -= 1
+    return
+
+
+def as_typed_array(data):
+    """
+    Returns a writable 1-D numpy array that shares memory with the data
+    when the data is a numeric numpy array or exports a writable numeric
+    buffer (array.array, memoryview, mmap, ...), otherwise None.
+    :param data:
+    :return:
+    """
+    if np is None or type(data) is list:
+        return None
+
+    if isinstance(data, np.ndarray):
+        view = data
+    else:
+        try:
+            buffer = memoryview(data)
+        except TypeError:
+            return None
+        if buffer.readonly or buffer.ndim != 1:
+            return None
+        try:
+            dtype = np.dtype(buffer.format.lstrip("@"))
+        except TypeError:
+            return None
+        view = np.frombuffer(buffer, dtype=dtype)
+
+    if view.ndim != 1 or not view.flags.writeable or view.dtype.kind not in "biuf":
+        return None
+    return view
+
+
+def SortBuffer(data, stable=False):
+    """
+    Sorts a typed numeric buffer in place through a zero-copy numpy
+    view, without boxing the elements into Python objects.
+    :param data: numpy array or writable buffer (array.array, memoryview, mmap)
+    :param stable: keep equal elements in order (radix/merge based sort)
+    :return: the data
+    """
+    view = as_typed_array(data)
+    if view is None:
+        raise TypeError("SortBuffer needs numpy and a writable 1-D numeric buffer")
+
+    view.sort(kind="stable" if stable else "quicksort")
+    return data
 
 
 ###############################################################
 # Selection Sort Method                                       #
 ###############################################################
+@key_sort()
 def SelectionSortIterative(data, current_index):
     """
 
@@ -74,6 +363,7 @@ def SelectionSortIterative(data, current_index):
 
     return
 
+@key_sort()
 def SelectionSortRecursive(data, current_index):
     """
 
@@ -83,7 +373,7 @@ def SelectionSortRecursive(data, current_index):
     """
     if current_index < len(data) - 1:
         Swap(data, current_index, FindMinElementIndex(data, current_index))
-        SelectionSortRecursive(data, current_index + 1)
+        SelectionSortRecursive.__wrapped__(data, current_index + 1)
 
     return
 
@@ -124,19 +414,28 @@ def FindMinElementIndex(data, current_index):
 ###############################################################
 # Insertion Sort Method                                       #
 ###############################################################
-def InsertionSort(data):
+@key_sort()
+def InsertionSort(data, lo=0, hi=None):
     """
-    This is the insertion sort algorithm
+    This is the insertion sort algorithm. The optional lo/hi
+    bounds restrict the sort to the data[lo:hi] slice, so the
+    function can be used as a small-array base case by the
+    divide-and-conquer sorts.
     :param data:
+    :param lo: first index of the range to sort
+    :param hi: end (exclusive) of the range, defaults to len(data)
     :return:
     """
+    if hi is None:
+        hi = len(data)
+
     # Start with the second element
-    for idx in range(1, len(data)):
+    for idx in range(lo + 1, hi):
         val = data[idx]
 
         # loop through all previous elements
         i = idx - 1
-        while(i >= 0) and data[i] > val:
+        while(i >= lo) and data[i] > val:
             data[i + 1] = data[i]
             i -= 1
         data[i + 1] = val
@@ -147,6 +446,7 @@ def InsertionSort(data):
 ###############################################################
 # QuickSort Method                                            #
 ###############################################################
+@key_sort(in_place=False)
 def QuickSortSimple(data):
     """
     A Simple version of the recursive quicksort algorithm.
@@ -185,8 +485,8 @@ def QuickSortSimple(data):
             right.append(val)
 
     # Sort the subsets
-    left = QuickSortSimple(left)
-    right = QuickSortSimple(right)
+    left = QuickSortSimple.__wrapped__(left)
+    right = QuickSortSimple.__wrapped__(right)
 
     # Combine the sorted arrays and pivot back
     data = []
@@ -197,9 +497,123 @@ def QuickSortSimple(data):
     return data
 
 
+@key_sort()
+def QuickSort3Way(data, lo=0, hi=None, cutoff=INSERTION_SORT_CUTOFF):
+    """
+    In-place quicksort with Dijkstra 3-way partitioning. Elements
+    equal to the pivot are gathered in the middle and never looked
+    at again, which makes the sort linear when there are only a few
+    unique keys. The pivot is the median of three for small ranges
+    and Tukey's ninther for large ones.
+    :param data:
+    :param lo: first index of the range to sort
+    :param hi: end (exclusive) of the range, defaults to len(data)
+    :param cutoff: size below which insertion sort takes over
+    :return: the sorted data
+    """
+    if hi is None:
+        hi = len(data)
+
+    while hi - lo > cutoff:
+        lt, gt = _partition3(data, lo, hi, _choose_pivot(data, lo, hi))
+
+        # Recurse into the smaller side, loop on the larger one
+        if lt - lo < hi - gt:
+            QuickSort3Way.__wrapped__(data, lo, lt, cutoff)
+            lo = gt + 1
+        else:
+            QuickSort3Way.__wrapped__(data, gt + 1, hi, cutoff)
+            hi = lt
+
+    InsertionSort.__wrapped__(data, lo, hi)
+    return data
+
+
+def _partition3(data, lo, hi, pivot_index):
+    """
+    Helper function that performs Dijkstra 3-way partitioning of
+    data[lo:hi] around the value at pivot_index. Afterwards
+    data[lo:lt] < pivot, data[lt:gt + 1] == pivot and
+    data[gt + 1:hi] > pivot.
+    :param data:
+    :param lo:
+    :param hi:
+    :param pivot_index:
+    :return: (lt, gt)
+    """
+    data[lo], data[pivot_index] = data[pivot_index], data[lo]
+    pivot_value = data[lo]
+
+    lt = lo
+    i = lo + 1
+    gt = hi - 1
+    while i <= gt:
+        val = data[i]
+        if val < pivot_value:
+            data[lt], data[i] = val, data[lt]
+            lt += 1
+            i += 1
+        elif pivot_value < val:
+            data[i], data[gt] = data[gt], val
+            gt -= 1
+        else:
+            i += 1
+
+    return lt, gt
+
+
+# Ranges at least this long use the ninther instead of median of three
+NINTHER_THRESHOLD = 40
+
+
+def _choose_pivot(data, lo, hi):
+    """
+    Helper function that picks the pivot index for data[lo:hi]:
+    the median of the first, middle and last elements, or for large
+    ranges the median of three such medians (Tukey's ninther).
+    :param data:
+    :param lo:
+    :param hi:
+    :return:
+    """
+    n = hi - lo
+    mid = lo + n // 2
+    last = hi - 1
+
+    if n < NINTHER_THRESHOLD:
+        return _median_of_three(data, lo, mid, last)
+
+    step = n // 8
+    return _median_of_three(data,
+                            _median_of_three(data, lo, lo + step, lo + 2 * step),
+                            _median_of_three(data, mid - step, mid, mid + step),
+                            _median_of_three(data, last - 2 * step, last - step, last))
+
+
+def _median_of_three(data, i, j, k):
+    """
+    Helper function that returns the index of the median
+    of data[i], data[j] and data[k].
+    :param data:
+    :param i:
+    :param j:
+    :param k:
+    :return:
+    """
+    a, b, c = data[i], data[j], data[k]
+    if a < b:
+        if b < c:
+            return j
+        return k if a < c else i
+    if a < c:
+        return i
+    return k if b < c else j
+
+
 ###############################################################
 # MergeSort Method                                            #
 ###############################################################
+@key_sort()
 def MergeSortSimple(data):
     """
     Recursive merge sort algorithm implementation
@@ -218,12 +632,12 @@ def MergeSortSimple(data):
     right = []
 
     # Copy the arrays
-    left = data[:mid]
-    right = data[mid:]
+    left = snapshot(data, 0, mid)
+    right = snapshot(data, mid, n)
 
     # Sort each array and then merge them together
-    MergeSortSimple(left)
-    MergeSortSimple(right)
+    MergeSortSimple.__wrapped__(left)
+    MergeSortSimple.__wrapped__(right)
 
     return merge(data, left, right)
 
@@ -239,9 +653,11 @@ def merge(dest, left, right):
     data_idx = 0
     left_idx = 0
     right_idx = 0
+    left_len = len(left)
+    right_len = len(right)
 
     # merge arrays while there are elements in both
-    while left_idx < len(left) and right_idx < len(right):
+    while left_idx < left_len and right_idx < right_len:
         if left[left_idx] <= right[right_idx]:
             dest[data_idx] = left[left_idx]
             data_idx += 1
@@ -252,12 +668,12 @@ def merge(dest, left, right):
             right_idx += 1
 
     # Copy the rest of whichever array remains
-    while left_idx < len(left):
+    while left_idx < left_len:
         dest[data_idx] = left[left_idx]
         data_idx += 1
         left_idx += 1
 
-    while right_idx < len(right):
+    while right_idx < right_len:
         dest[data_idx] = right[right_idx]
         data_idx += 1
         right_idx += 1
@@ -265,54 +681,1837 @@ def merge(dest, left, right):
     return dest
 
 
+@key_sort()
+def MergeSortBottomUp(data, cutoff=INSERTION_SORT_CUTOFF):
+    """
+    Iterative (bottom-up) merge sort. Blocks of the cutoff size are
+    sorted with insertion sort, then runs of doubling width are merged
+    back and forth between the data and one preallocated auxiliary
+    buffer. Pairs of runs that are already in order are copied instead
+    of merged. The sort is stable and sorts the data in place.
+    :param data:
+    :param cutoff: size of the initial insertion sorted blocks
+    :return: the sorted data
+    """
+    n = len(data)
+    if n < 2:
+        return data
+
+    width = max(cutoff, 1)
+    for lo in range(0, n, width):
+        InsertionSort.__wrapped__(data, lo, min(lo + width, n))
+
+    src = data
+    dst = [None] * n
+    while width < n:
+        for lo in range(0, n, 2 * width):
+            mid = min(lo + width, n)
+            hi = min(lo + 2 * width, n)
+            if mid == hi or not src[mid] < src[mid - 1]:
+                # Nothing to merge, the runs are already in order
+                copy_range(dst, lo, src, lo, hi)
+            else:
+                merge_range(dst, src, lo, mid, hi)
+        src, dst = dst, src
+        width *= 2
+
+    # The last pass may have landed in the auxiliary buffer
+    if src is not data:
+        copy_range(data, 0, src, 0, n)
+
+    return data
+
+
+def merge_range(dest, src, lo, mid, hi):
+    """
+    Helper function that merges the sorted runs src[lo:mid] and
+    src[mid:hi] into dest[lo:hi]. Ties are taken from the left run,
+    which keeps the merge stable.
+    :param dest:
+    :param src:
+    :param lo:
+    :param mid:
+    :param hi:
+    :return:
+    """
+    left_idx = lo
+    right_idx = mid
+    data_idx = lo
+
+    left_val = src[left_idx]
+    right_val = src[right_idx]
+    while True:
+        if right_val < left_val:
+            dest[data_idx] = right_val
+            data_idx += 1
+            right_idx += 1
+            if right_idx == hi:
+                break
+            right_val = src[right_idx]
+        else:
+            dest[data_idx] = left_val
+            data_idx += 1
+            left_idx += 1
+            if left_idx == mid:
+                break
+            left_val = src[left_idx]
+
+    # Copy the rest of whichever run remains
+    if left_idx < mid:
+        copy_range(dest, data_idx, src, left_idx, mid)
+    else:
+        copy_range(dest, data_idx, src, right_idx, hi)
+
+    return dest
+
+
+# Marks that no item has been produced yet
+_NOTHING = object()
+
+
+def merge_sorted(*iterables, key=None, unique=False, block_size=1):
+    """
+    Generator that lazily merges sorted iterables into one sorted
+    stream. A min heap holds one (key, source, item) entry per source,
+    so memory is O(k) for k sources. Equal keys are produced in source
+    order, which keeps the merge stable.
+    :param iterables: sorted iterables
+    :param key: optional function that extracts the comparison key
+    :param unique: skip items whose key equals the previous item's key
+    :param block_size: number of items pulled from a source at a time,
+                       larger blocks cut the per-item iterator overhead
+    :return:
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+
+    iterators = [iter(iterable) for iterable in iterables]
+    merge = _MergeHeap([list(itertools.islice(iterator, block_size)) for iterator in iterators],
+                       key, unique)
+    while merge:
+        source, item, emit = merge.top()
+        if emit:
+            yield item
+
+        # Advance the source, refilling its block when it runs out
+        block = None
+        if merge.exhausted(source):
+            block = list(itertools.islice(iterators[source], block_size))
+        merge.advance(source, block)
+
+
+async def amerge_sorted(*iterables, key=None, unique=False, block_size=1):
+    """
+    Asynchronous version of merge_sorted. The sources may be async
+    iterables (e.g. streams from sockets) or plain iterables.
+    :param iterables: sorted (async) iterables
+    :param key: optional function that extracts the comparison key
+    :param unique: skip items whose key equals the previous item's key
+    :param block_size: number of items pulled from a source at a time
+    :return:
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+
+    iterators = [iterable.__aiter__() if hasattr(iterable, "__aiter__") else iter(iterable)
+                 for iterable in iterables]
+    merge = _MergeHeap([await _pull_block(iterator, block_size) for iterator in iterators],
+                       key, unique)
+    while merge:
+        source, item, emit = merge.top()
+        if emit:
+            yield item
+
+        block = None
+        if merge.exhausted(source):
+            block = await _pull_block(iterators[source], block_size)
+        merge.advance(source, block)
+
+
+class _MergeHeap:
+    """
+    Helper class that holds the state of a k-way merge: the min heap of
+    (key, source, item) entries and the current block of every source.
+    merge_sorted and amerge_sorted only differ in how they pull the
+    next block of a source.
+    """
+    def __init__(self, blocks, key, unique):
+        self.key = key
+        self.unique = unique
+        self.last = _NOTHING
+        self.blocks = blocks
+        self.positions = [0] * len(blocks)
+        self.heap = []
+        for source, block in enumerate(blocks):
+            if block:
+                self.positions[source] = 1
+                item = block[0]
+                self.heap.append((item if key is None else key(item), source, item))
+        heapify(self.heap)
+
+    def __bool__(self):
+        return bool(self.heap)
+
+    def top(self):
+        """
+        Returns the smallest item and its source, and whether it is
+        produced or skipped as a duplicate.
+        :return: (source, item, emit)
+        """
+        item_key, source, item = self.heap[0]
+        emit = not self.unique or self.last is _NOTHING or self.last < item_key
+        if emit:
+            self.last = item_key
+        return source, item, emit
+
+    def exhausted(self, source):
+        """
+        Returns True when the current block of the source is used up.
+        :param source:
+        :return:
+        """
+        return self.positions[source] == len(self.blocks[source])
+
+    def advance(self, source, block=None):
+        """
+        Replaces the top entry by the next item of its source, or drops
+        it when the source is done.
+        :param source:
+        :param block: new block of the source, after it was exhausted
+        :return:
+        """
+        if block is not None:
+            self.blocks[source] = block
+            self.positions[source] = 0
+        else:
+            block = self.blocks[source]
+
+        if block:
+            pos = self.positions[source]
+            item = block[pos]
+            self.positions[source] = pos + 1
+            heap_replace(self.heap, (item if self.key is None else self.key(item), source, item))
+        else:
+            heap_pop(self.heap)
+        return
+
+
+async def _pull_block(iterator, block_size):
+    """
+    Helper coroutine that pulls up to block_size items from an async
+    or plain iterator.
+    :param iterator:
+    :param block_size:
+    :return: list of items, empty when the iterator is exhausted
+    """
+    if not hasattr(iterator, "__anext__"):
+        return list(itertools.islice(iterator, block_size))
+
+    block = []
+    while len(block) < block_size:
+        try:
+            block.append(await iterator.__anext__())
+        except StopAsyncIteration:
+            break
+    return block
+
+
 ###############################################################
-# ShellSort Method                                            #
+# Introsort (hybrid) Method                                   #
 ###############################################################
-def ShellSort(data):
+@key_sort()
+def sort(data, cutoff=INSERTION_SORT_CUTOFF):
     """
-    Shell sort method
+    Sorts the data in place with introsort: quicksort partitioning,
+    insertion sort for ranges below the cutoff and heap sort once the
+    recursion depth exceeds 2 * lg(n). This is the general purpose
+    entry point of the module with guaranteed O(n * lg(n)) time.
+    Numeric buffers are sorted in place through a numpy view when
+    numpy is available (see SortBuffer).
     :param data:
-    :return:
+    :param cutoff: size below which insertion sort takes over
+    :return: the sorted data
     """
     n = len(data)
+    if n < 2:
+        return data
 
-    # Generate increment sequence
-    increment_sequence = generate_increments_sequence(n)
-
-    # Loop through the increment sequence
-    for incr in increment_sequence:
-        # loop through each subset of the sequence
-        for j in range(incr):
-            # loop through each element in the subset
-            for k in range(j, n, incr):
-                guess = k
-                # find the correct place for the element
-                while guess >= incr and data[guess - incr] > data[guess]:
-                    # swap two elements
-                    data[guess], data[guess - incr] = data[guess - incr], data[guess]
-                    guess -= incr
+    # Typed buffers are sorted without boxing the elements
+    if type(data) is not list and as_typed_array(data) is not None:
+        return SortBuffer(data)
 
+    depth_limit = 2 * int(math.log2(n))
+    _introsort(data, 0, n, depth_limit, max(cutoff, 2))
     return data
 
 
-def generate_increments_sequence(length):
+def _introsort(data, lo, hi, depth_limit, cutoff):
     """
-    Helper frunction for Shell Sort algorithm.
-    It generates the seqeunce equal to e^(n-2) + 1
-    :param length:
+    Helper function that sorts data[lo:hi]. It recurses into the
+    smaller partition and loops on the larger one, so the stack
+    depth stays O(lg(n)).
+    :param data:
+    :param lo:
+    :param hi:
+    :param depth_limit: remaining partitioning levels before heap sort
+    :param cutoff:
     :return:
     """
-    sequence = []
-    idx = 0
+    while hi - lo > cutoff:
+        if depth_limit == 0:
+            HeapSort(data, lo, hi)
+            return
+        depth_limit -= 1
+
+        p = _partition(data, lo, hi)
+        if p - lo < hi - p:
+            _introsort(data, lo, p, depth_limit, cutoff)
+            lo = p + 1
+        else:
+            _introsort(data, p + 1, hi, depth_limit, cutoff)
+            hi = p
+
+    InsertionSort.__wrapped__(data, lo, hi)
+
+
+def _partition(data, lo, hi):
+    """
+    Helper function that partitions data[lo:hi] around a
+    median-of-three pivot (Hoare style scan) and returns the
+    final index of the pivot.
+    :param data:
+    :param lo:
+    :param hi:
+    :return:
+    """
+    mid = (lo + hi) // 2
+    last = hi - 1
 
+    # Order data[lo], data[mid], data[last] so the median is in the middle
+    if data[mid] < data[lo]:
+        data[lo], data[mid] = data[mid], data[lo]
+    if data[last] < data[mid]:
+        data[mid], data[last] = data[last], data[mid]
+        if data[mid] < data[lo]:
+            data[lo], data[mid] = data[mid], data[lo]
+
+    # Park the pivot next to the end; data[last] is a sentinel
+    pivot = data[mid]
+    data[mid], data[last - 1] = data[last - 1], data[mid]
+
+    i = lo
+    j = last - 1
     while True:
-        idx += 1
-        val = int(round(math.exp(idx - 2)) + 1)
-        if val >= length:
+        i += 1
+        while data[i] < pivot:
+            i += 1
+        j -= 1
+        while pivot < data[j]:
+            j -= 1
+        if i >= j:
             break
-        sequence.append(val)
+        data[i], data[j] = data[j], data[i]
 
-    return sequence
+    # Move the pivot into its final place
+    data[i], data[last - 1] = data[last - 1], data[i]
+    return i
+
+
+###############################################################
+# Natural Merge Sort (Timsort) Method                         #
+###############################################################
+# Number of consecutive wins of one run that switches a merge to galloping
+MIN_GALLOP = 7
+
+
+@key_sort()
+def TimSort(data):
+    """
+    Natural merge sort in the style of Timsort. Ascending and strictly
+    descending runs are detected (the latter reversed in place), short
+    runs are extended to the minimum run length with binary insertion
+    sort, and runs are merged from a stack that keeps their lengths
+    balanced. Merges switch to galloping mode when one run keeps
+    winning. The sort is stable and sorts the data in place.
+    :param data:
+    :return: the sorted data
+    """
+    n = len(data)
+    if n < 2:
+        return data
+
+    if isinstance(data, mmap.mmap):
+        # bisect reads a mmap as bytes objects, a memoryview as ints
+        with memoryview(data) as view:
+            TimSort.__wrapped__(view)
+        return data
+
+    min_run = compute_min_run(n)
+    runs = []
+    min_gallop = MIN_GALLOP
+
+    lo = 0
+    while lo < n:
+        run_len = count_run_and_make_ascending(data, lo, n)
+
+        # Extend short runs to the min run length
+        if run_len < min_run:
+            force = min(min_run, n - lo)
+            BinaryInsertionSort.__wrapped__(data, lo, lo + force, lo + run_len)
+            run_len = force
+
+        runs.append([lo, run_len])
+        min_gallop = _merge_collapse(data, runs, min_gallop)
+        lo += run_len
+
+    # Merge all remaining runs
+    while len(runs) > 1:
+        i = len(runs) - 2
+        if i > 0 and runs[i - 1][1] < runs[i + 1][1]:
+            i -= 1
+        min_gallop = _merge_at(data, runs, i, min_gallop)
+
+    return data
+
+
+def compute_min_run(n):
+    """
+    Helper function that computes the minimum run length for Timsort.
+    The result is in the 32..64 range (or n for small n) and is chosen
+    so that n / min_run is a power of two or slightly less than one.
+    :param n:
+    :return:
+    """
+    r = 0
+    while n >= 64:
+        r |= n & 1
+        n >>= 1
+    return n + r
+
+
+def count_run_and_make_ascending(data, lo, hi):
+    """
+    Helper function that returns the length of the run starting at lo.
+    A strictly descending run is reversed in place; runs with equal
+    elements are never treated as descending so the sort stays stable.
+    :param data:
+    :param lo:
+    :param hi:
+    :return:
+    """
+    run_hi = lo + 1
+    if run_hi == hi:
+        return 1
+
+    if data[run_hi] < data[lo]:
+        # Strictly descending
+        run_hi += 1
+        while run_hi < hi and data[run_hi] < data[run_hi - 1]:
+            run_hi += 1
+        reverse_range(data, lo, run_hi)
+    else:
+        # Ascending
+        run_hi += 1
+        while run_hi < hi and not data[run_hi] < data[run_hi - 1]:
+            run_hi += 1
+
+    return run_hi - lo
+
+
+@key_sort()
+def BinaryInsertionSort(data, lo=0, hi=None, start=None):
+    """
+    Insertion sort that finds the position of every element with a
+    binary search, so it does O(n * lg(n)) comparisons (the moves are
+    still O(n^2)). data[lo:start] must already be sorted.
+    :param data:
+    :param lo: first index of the range to sort
+    :param hi: end (exclusive) of the range, defaults to len(data)
+    :param start: first element that is not known to be in order
+    :return:
+    """
+    if hi is None:
+        hi = len(data)
+    if start is None or start == lo:
+        start = lo + 1
+
+    if isinstance(data, mmap.mmap):
+        # bisect reads a mmap as bytes objects, a memoryview as ints
+        with memoryview(data) as view:
+            BinaryInsertionSort.__wrapped__(view, lo, hi, start)
+        return
+
+    for idx in range(start, hi):
+        val = data[idx]
+        # Rightmost position keeps equal elements in their order
+        pos = bisect.bisect_right(data, val, lo, idx)
+        if pos != idx:
+            copy_range(data, pos + 1, data, pos, idx)
+            data[pos] = val
+
+    return
+
+
+def _merge_collapse(data, runs, min_gallop):
+    """
+    Helper function that merges runs on top of the stack until their
+    lengths satisfy the Timsort invariants:
+        runs[i - 2] > runs[i - 1] + runs[i] and runs[i - 1] > runs[i]
+    :param data:
+    :param runs: stack of [base, length] pairs
+    :param min_gallop:
+    :return: the updated min_gallop
+    """
+    while len(runs) > 1:
+        i = len(runs) - 2
+        if (i > 0 and runs[i - 1][1] <= runs[i][1] + runs[i + 1][1]) or \
+                (i > 1 and runs[i - 2][1] <= runs[i - 1][1] + runs[i][1]):
+            if runs[i - 1][1] < runs[i + 1][1]:
+                i -= 1
+        elif runs[i][1] > runs[i + 1][1]:
+            break
+        min_gallop = _merge_at(data, runs, i, min_gallop)
+
+    return min_gallop
+
+
+def _merge_at(data, runs, i, min_gallop):
+    """
+    Helper function that merges the runs i and i + 1 of the stack.
+    Elements of the first run that are already in place and elements
+    of the second run that are already in place are trimmed first.
+    :param data:
+    :param runs:
+    :param i:
+    :param min_gallop:
+    :return: the updated min_gallop
+    """
+    base1, len1 = runs[i]
+    base2, len2 = runs[i + 1]
+    runs[i][1] = len1 + len2
+    del runs[i + 1]
+
+    # Skip the prefix of run 1 that is not greater than the start of run 2
+    start = gallop_right(data[base2], data, base1, base1 + len1)
+    len1 -= start - base1
+    base1 = start
+    if len1 == 0:
+        return min_gallop
+
+    # Skip the suffix of run 2 that is not less than the end of run 1
+    len2 = gallop_left(data[base1 + len1 - 1], data, base2, base2 + len2, from_right=True) - base2
+    if len2 == 0:
+        return min_gallop
+
+    if len1 <= len2:
+        return _merge_lo(data, base1, len1, base2, len2, min_gallop)
+    return _merge_hi(data, base1, len1, base2, len2, min_gallop)
+
+
+def gallop_left(key, data, lo, hi, from_right=False):
+    """
+    Returns the leftmost position in the sorted data[lo:hi] where the
+    key can be inserted (every element before it is less than the key).
+    The search probes 1, 3, 7, ... elements away from the starting edge
+    and then bisects the bracket, so it costs O(lg(k)) comparisons when
+    the answer is k elements away from that edge.
+    :param key:
+    :param data:
+    :param lo:
+    :param hi:
+    :param from_right: gallop from the right edge instead of the left
+    :return:
+    """
+    last = 0
+    ofs = 1
+    if not from_right:
+        while lo + ofs - 1 < hi and data[lo + ofs - 1] < key:
+            last = ofs
+            ofs = 2 * ofs + 1
+        return bisect.bisect_left(data, key, lo + last, min(lo + ofs - 1, hi))
+
+    while hi - ofs >= lo and not data[hi - ofs] < key:
+        last = ofs
+        ofs = 2 * ofs + 1
+    return bisect.bisect_left(data, key, max(hi - ofs + 1, lo), hi - last)
+
+
+def gallop_right(key, data, lo, hi, from_right=False):
+    """
+    Returns the rightmost position in the sorted data[lo:hi] where the
+    key can be inserted (every element before it is less than or equal
+    to the key). See gallop_left.
+    :param key:
+    :param data:
+    :param lo:
+    :param hi:
+    :param from_right: gallop from the right edge instead of the left
+    :return:
+    """
+    last = 0
+    ofs = 1
+    if not from_right:
+        while lo + ofs - 1 < hi and not key < data[lo + ofs - 1]:
+            last = ofs
+            ofs = 2 * ofs + 1
+        return bisect.bisect_right(data, key, lo + last, min(lo + ofs - 1, hi))
+
+    while hi - ofs >= lo and key < data[hi - ofs]:
+        last = ofs
+        ofs = 2 * ofs + 1
+    return bisect.bisect_right(data, key, max(hi - ofs + 1, lo), hi - last)
+
+
+def _merge_lo(data, base1, len1, base2, len2, min_gallop):
+    """
+    Helper function that merges two adjacent runs when the first one
+    is shorter. The first run is copied into a temporary list and the
+    merge runs left to right. Ties are taken from the first run.
+    :param data:
+    :param base1:
+    :param len1:
+    :param base2:
+    :param len2:
+    :param min_gallop:
+    :return: the updated min_gallop
+    """
+    tmp = snapshot(data, base1, base1 + len1)
+    i = 0
+    j = base2
+    end2 = base2 + len2
+    k = base1
+
+    done = False
+    while not done:
+        count1 = 0
+        count2 = 0
+
+        # Straight merge until one run wins min_gallop times in a row
+        while True:
+            if data[j] < tmp[i]:
+                data[k] = data[j]
+                k += 1
+                j += 1
+                count2 += 1
+                count1 = 0
+                if j == end2:
+                    done = True
+                    break
+            else:
+                data[k] = tmp[i]
+                k += 1
+                i += 1
+                count1 += 1
+                count2 = 0
+                if i == len1:
+                    done = True
+                    break
+            if count1 >= min_gallop or count2 >= min_gallop:
+                break
+        if done:
+            break
+
+        # Galloping mode: copy whole stretches found by exponential search
+        while True:
+            pos = gallop_right(data[j], tmp, i, len1)
+            count1 = pos - i
+            if count1:
+                copy_range(data, k, tmp, i, pos)
+                k += count1
+                i = pos
+                if i == len1:
+                    done = True
+                    break
+            data[k] = data[j]
+            k += 1
+            j += 1
+            if j == end2:
+                done = True
+                break
+
+            pos = gallop_left(tmp[i], data, j, end2)
+            count2 = pos - j
+            if count2:
+                copy_range(data, k, data, j, pos)
+                k += count2
+                j = pos
+                if j == end2:
+                    done = True
+                    break
+            data[k] = tmp[i]
+            k += 1
+            i += 1
+            if i == len1:
+                done = True
+                break
+
+            min_gallop -= 1
+            if count1 < MIN_GALLOP and count2 < MIN_GALLOP:
+                break
+        if done:
+            break
+
+        # Penalize leaving galloping mode
+        min_gallop = max(min_gallop, 0) + 2
+
+    # The rest of run 2 is already in place
+    if i < len1:
+        copy_range(data, k, tmp, i, len1)
+
+    return max(min_gallop, 1)
+
+
+def _merge_hi(data, base1, len1, base2, len2, min_gallop):
+    """
+    Helper function that merges two adjacent runs when the second one
+    is shorter. The second run is copied into a temporary list and the
+    merge runs right to left. Ties are taken from the second run so
+    the merge stays stable.
+    :param data:
+    :param base1:
+    :param len1:
+    :param base2:
+    :param len2:
+    :param min_gallop:
+    :return: the updated min_gallop
+    """
+    tmp = snapshot(data, base2, base2 + len2)
+    i = len2 - 1
+    j = base1 + len1 - 1
+    k = base2 + len2 - 1
+
+    done = False
+    while not done:
+        count1 = 0
+        count2 = 0
+
+        # Straight merge until one run wins min_gallop times in a row
+        while True:
+            if tmp[i] < data[j]:
+                data[k] = data[j]
+                k -= 1
+                j -= 1
+                count1 += 1
+                count2 = 0
+                if j < base1:
+                    done = True
+                    break
+            else:
+                data[k] = tmp[i]
+                k -= 1
+                i -= 1
+                count2 += 1
+                count1 = 0
+                if i < 0:
+                    done = True
+                    break
+            if count1 >= min_gallop or count2 >= min_gallop:
+                break
+        if done:
+            break
+
+        # Galloping mode: copy whole stretches found by exponential search
+        while True:
+            pos = gallop_right(tmp[i], data, base1, j + 1, from_right=True)
+            count1 = j + 1 - pos
+            if count1:
+                copy_range(data, k - count1 + 1, data, pos, j + 1)
+                k -= count1
+                j = pos - 1
+                if j < base1:
+                    done = True
+                    break
+            data[k] = tmp[i]
+            k -= 1
+            i -= 1
+            if i < 0:
+                done = True
+                break
+
+            pos = gallop_left(data[j], tmp, 0, i + 1, from_right=True)
+            count2 = i + 1 - pos
+            if count2:
+                copy_range(data, k - count2 + 1, tmp, pos, i + 1)
+                k -= count2
+                i = pos - 1
+                if i < 0:
+                    done = True
+                    break
+            data[k] = data[j]
+            k -= 1
+            j -= 1
+            if j < base1:
+                done = True
+                break
+
+            min_gallop -= 1
+            if count1 < MIN_GALLOP and count2 < MIN_GALLOP:
+                break
+        if done:
+            break
+
+        # Penalize leaving galloping mode
+        min_gallop = max(min_gallop, 0) + 2
+
+    # The rest of run 1 is already in place
+    if i >= 0:
+        copy_range(data, k - i, tmp, 0, i + 1)
+
+    return max(min_gallop, 1)
+
+
+###############################################################
+# LSD Radix Sort Method (numpy)                               #
+###############################################################
+# Arrays at least this long are sorted with 16 bit digits by default
+RADIX_WIDE_DIGIT_SIZE = 1 << 16
+
+
+def RadixSort(data, return_argsort=False, digit_bits=None):
+    """
+    Vectorized LSD radix sort for integer, float, bool and fixed width
+    byte string (numpy "S" dtype) keys. The keys are mapped to unsigned
+    integers with the same order, then sorted one digit per pass:
+    passes where all keys share the digit (min == max) are skipped,
+    and the stable scatter is a counting sort of the small integer
+    digits (np.argsort with kind="stable" sorts 8 and 16 bit integers
+    with a radix sort).
+    :param data: sequence or 1-D numpy array
+    :param return_argsort: also return the sorting permutation
+    :param digit_bits: bits per digit, 8 or 16; by default 16 for arrays
+                       of at least RADIX_WIDE_DIGIT_SIZE elements (half
+                       the passes) and 8 for smaller ones
+    :return: sorted numpy array, or (sorted array, permutation)
+    """
+    if np is None:
+        raise ImportError("RadixSort requires numpy")
+    if digit_bits not in (None, 8, 16):
+        raise ValueError("digit_bits must be 8 or 16")
+
+    values = np.asarray(data)
+    if values.ndim != 1:
+        raise ValueError("RadixSort sorts 1-D arrays only")
+    if not _radix_dtype(values.dtype):
+        raise TypeError("RadixSort can't sort {0} keys".format(values.dtype))
+
+    perm = radix_argsort(values, digit_bits)
+    result = values[perm]
+    if return_argsort:
+        return result, perm
+    return result
+
+
+def radix_argsort(values, digit_bits=None):
+    """
+    Returns the stable sorting permutation of a 1-D numpy array, one
+    LSD radix pass per digit of its keys.
+    :param values:
+    :param digit_bits: bits per digit, 8, 16 or None (see RadixSort)
+    :return: numpy array of indices
+    """
+    if len(values) < 2:
+        return np.arange(len(values))
+    if digit_bits is None:
+        digit_bits = 16 if len(values) >= RADIX_WIDE_DIGIT_SIZE else 8
+
+    # perm stays None while it is the identity
+    perm = None
+    keys = radix_keys(values)
+    if keys.ndim == 2:
+        # Byte strings: one pass per byte column, last column first
+        for column in range(keys.shape[1] - 1, -1, -1):
+            perm, keys = _radix_pass(keys[:, column], perm, keys, column == 0)
+    else:
+        key_bits = keys.dtype.itemsize * 8
+        digit_bits = min(digit_bits, key_bits)
+        mask = (1 << digit_bits) - 1
+        digit_type = np.uint8 if digit_bits == 8 else np.uint16
+        for shift in range(0, key_bits, digit_bits):
+            digits = ((keys >> keys.dtype.type(shift)) & keys.dtype.type(mask)).astype(digit_type)
+            perm, keys = _radix_pass(digits, perm, keys, shift + digit_bits >= key_bits)
+
+    return np.arange(len(values)) if perm is None else perm
+
+
+def radix_keys(values):
+    """
+    Helper function that maps a numpy array to unsigned integer keys
+    with the same order:
+        > unsigned integers and bools are used as they are;
+        > signed integers get their sign bit flipped;
+        > floats get all bits flipped when negative and only the sign
+          bit flipped otherwise (IEEE 754 order-preserving transform),
+          -0.0 is folded into 0.0 and every NaN into one positive NaN,
+          which sorts after +inf like in np.sort;
+        > byte strings become a 2-D array of uint8 columns.
+    :param values:
+    :return:
+    """
+    if not _radix_dtype(values.dtype):
+        raise TypeError("RadixSort can't sort {0} keys".format(values.dtype))
+    kind = values.dtype.kind
+    itemsize = values.dtype.itemsize
+
+    if kind == "b":
+        return values.view(np.uint8)
+    if kind == "u":
+        return values
+    if kind == "S":
+        return np.ascontiguousarray(values).view(np.uint8).reshape(len(values), itemsize)
+
+    unsigned = np.dtype("u{0}".format(itemsize))
+    sign_bit = unsigned.type(1 << (itemsize * 8 - 1))
+    if kind == "i":
+        return np.ascontiguousarray(values).view(unsigned) ^ sign_bit
+
+    # Floats: -0.0 and 0.0 compare equal, so they must get the same key,
+    # and a NaN with the sign bit set would otherwise sort before -inf
+    values = np.where(values == 0, values.dtype.type(0), values)
+    values = np.where(np.isnan(values), values.dtype.type(np.nan), values)
+    bits = values.view(unsigned)
+    negative = (bits & sign_bit) != 0
+    return np.where(negative, ~bits, bits | sign_bit)
+
+
+def _radix_dtype(dtype):
+    """
+    Helper function that tells whether radix_keys can map the dtype:
+    numbers need an unsigned integer type of the same size, which long
+    doubles (10 or 16 bytes) and complex numbers don't have.
+    :param dtype:
+    :return:
+    """
+    if dtype.kind in "bS":
+        return True
+    return dtype.kind in "iuf" and dtype.itemsize in (1, 2, 4, 8)
+
+
+def _radix_pass(digits, perm, keys, last):
+    """
+    Helper function that performs one stable counting pass on the
+    digits and applies it to the permutation and the keys. The first
+    pass that moves anything is the permutation itself, and after the
+    last pass the keys are no longer needed, so both gathers are saved.
+    :param digits:
+    :param perm: permutation so far, None for the identity
+    :param keys:
+    :param last: no pass follows
+    :return: (perm, keys)
+    """
+    if digits.min() == digits.max():
+        # Every key has the same digit, the pass wouldn't move anything
+        return perm, keys
+
+    order = np.argsort(digits, kind="stable")
+    perm = order if perm is None else perm[order]
+    return perm, (keys if last else keys[order])
+
+
+###############################################################
+# Argsort and Lexicographic Sort Methods                      #
+###############################################################
+def argsort(data, algorithm="auto", key=None, reverse=False):
+    """
+    Returns the stable sorting permutation of the data: data[perm[0]],
+    data[perm[1]], ... is sorted. The comparison algorithms sort
+    (key, position) pairs, so ties keep their input order and the
+    records themselves are never compared; "radix" uses the numpy LSD
+    radix passes and never boxes the values.
+    :param data: sequence or 1-D numpy array
+    :param algorithm: "merge" (bottom-up merge sort), "timsort", "radix"
+                      or "auto", which picks radix for numeric and byte
+                      string arrays when numpy is available
+    :param key: key function (comparison algorithms only)
+    :param reverse: descending order, equal keys still keep their order
+                    (comparison algorithms only)
+    :return: list of indices, or a numpy array of indices for radix
+    """
+    if algorithm == "auto":
+        algorithm = "radix" if key is None and not reverse and _radix_array(data) is not None \
+            else "timsort"
+
+    if algorithm == "radix":
+        if key is not None or reverse:
+            raise ValueError("The radix argsort supports neither key nor reverse")
+        values = _radix_array(data)
+        if values is None:
+            raise TypeError("The radix argsort needs a 1-D numeric or byte string array")
+        return radix_argsort(values)
+
+    if algorithm not in ARGSORT_ALGORITHMS:
+        raise ValueError("Unknown argsort algorithm {0!r}".format(algorithm))
+
+    decorated = decorate(data, key, reverse)
+    ARGSORT_ALGORITHMS[algorithm](decorated)
+    if reverse:
+        return [-i for _, i in reversed(decorated)]
+    return [i for _, i in decorated]
+
+
+def lexsort(columns, algorithm="auto", return_columns=False):
+    """
+    Returns the permutation that sorts the records of parallel columns
+    lexicographically, columns[0] being the primary key. The columns
+    are sorted least significant first with one stable argsort pass
+    each, every pass reading its column through the permutation built
+    so far, so no row tuples are ever created.
+    :param columns: list of equally long sequences or 1-D numpy arrays
+    :param algorithm: argsort algorithm used for every pass ("auto"
+                      decides per column)
+    :param return_columns: also gather every column with the permutation
+    :return: permutation, or (permutation, list of sorted columns)
+    """
+    if not columns:
+        raise ValueError("lexsort needs at least one column")
+    n = len(columns[0])
+    if any(len(column) != n for column in columns):
+        raise ValueError("All columns must have the same length")
+
+    perm = None
+    for column in reversed(columns):
+        keys = column if perm is None else gather(column, perm)
+        order = argsort(keys, algorithm)
+        perm = order if perm is None else gather(perm, order)
+
+    if return_columns:
+        return perm, [gather(column, perm) for column in columns]
+    return perm
+
+
+def gather(values, perm):
+    """
+    Returns the values in the order of the permutation, a single fancy
+    indexing step for numpy arrays and a list otherwise. Other columns
+    are never converted to arrays, which would turn tuples into 2-D
+    rows and strings into fixed width numpy strings.
+    :param values:
+    :param perm:
+    :return:
+    """
+    if np is not None:
+        if isinstance(values, np.ndarray):
+            return values[np.asarray(perm, dtype=np.intp)]
+        if isinstance(perm, np.ndarray):
+            perm = perm.tolist()
+    return [values[i] for i in perm]
+
+
+def _radix_array(data):
+    """
+    Helper function that returns the data as a 1-D numpy array when
+    the radix sort can handle its dtype, otherwise None.
+    :param data:
+    :return:
+    """
+    if np is None:
+        return None
+    if isinstance(data, np.ndarray):
+        values = data
+    elif isinstance(data, (list, tuple)):
+        # Only homogeneous numbers: mixed lists would be coerced and
+        # numpy byte strings drop trailing zero bytes
+        if not (all(type(value) is int for value in data) or
+                all(type(value) is float for value in data)):
+            return None
+        try:
+            values = np.asarray(data)
+        except OverflowError:
+            return None
+    else:
+        values = as_typed_array(data)
+        if values is None:
+            return None
+
+    if values.ndim != 1 or not _radix_dtype(values.dtype):
+        return None
+    return values
+
+
+# Stable comparison sorts used by argsort
+ARGSORT_ALGORITHMS = {
+    "merge": MergeSortBottomUp,
+    "timsort": TimSort,
+}
+
+
+###############################################################
+# Parallel Sample Sort Method (numpy)                         #
+###############################################################
+# Arrays shorter than this are sorted in the calling process
+PARALLEL_SORT_MIN_SIZE = 1 << 16
+
+
+def ParallelSampleSort(data, workers=None, oversample=32, seed=None):
+    """
+    Multi-process sample sort of numeric data. Splitters are taken
+    from an oversampled random sample, the data is gathered bucket by
+    bucket into a shared memory block and every bucket is sorted in
+    place (numpy's stable sort on a view, radix sort for small integer
+    types) by a ProcessPoolExecutor worker that attaches to the same
+    block, so no data is pickled between the processes. The sorted
+    buckets already form the result; the only copy is the one out of
+    the shared block. Small inputs are sorted in the calling process.
+    :param data: sequence or 1-D numpy array of numbers
+    :param workers: number of worker processes, defaults to os.cpu_count()
+    :param oversample: sample elements drawn per splitter
+    :param seed: optional seed of the splitter sampling
+    :return: sorted numpy array
+    """
+    if np is None:
+        raise ImportError("ParallelSampleSort requires numpy")
+
+    values = np.asarray(data)
+    if values.ndim != 1:
+        raise ValueError("ParallelSampleSort sorts 1-D arrays only")
+
+    # Long doubles have no radix keys, numpy sorts them instead
+    local_sort = RadixSort
+    if values.dtype.kind == "f" and not _radix_dtype(values.dtype):
+        local_sort = functools.partial(np.sort, kind="stable")
+
+    n = len(values)
+    buckets = workers or os.cpu_count() or 1
+    if buckets < 2 or n < max(PARALLEL_SORT_MIN_SIZE, buckets * oversample):
+        return local_sort(values)
+
+    # Splitters: every oversample-th element of a sorted random sample
+    sample = values[np.random.default_rng(seed).integers(0, n, size=buckets * oversample)]
+    splitters = local_sort(sample)[oversample::oversample][:buckets - 1]
+
+    # Bucket of every element; counts and offsets of every bucket
+    bucket_ids = np.searchsorted(splitters, values, side="right").astype(np.min_scalar_type(buckets))
+    counts = np.bincount(bucket_ids, minlength=buckets)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        shared = np.ndarray(n, dtype=values.dtype, buffer=shm.buf)
+        np.take(values, np.argsort(bucket_ids, kind="stable"), out=shared)
+
+        with ProcessPoolExecutor(max_workers=buckets) as executor:
+            futures = [executor.submit(_sort_shared_bucket, shm.name, values.dtype.str, n,
+                                       int(offsets[b]), int(offsets[b + 1]))
+                       for b in range(buckets) if counts[b] > 1]
+            for future in futures:
+                future.result()
+
+        result = shared.copy()
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return result
+
+
+def _sort_shared_bucket(name, dtype, n, lo, hi):
+    """
+    Worker function of the parallel sample sort: attaches to the
+    shared memory block and sorts the bucket shared[lo:hi] in place
+    through a view, without building a sorted copy.
+    :param name: shared memory block name
+    :param dtype: numpy dtype string of the elements
+    :param n: total number of elements in the block
+    :param lo:
+    :param hi:
+    :return:
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        shared = np.ndarray(n, dtype=np.dtype(dtype), buffer=shm.buf)
+        SortBuffer(shared[lo:hi], stable=True)
+        del shared
+    finally:
+        shm.close()
+    return
+
+
+###############################################################
+# Order Statistics Methods                                    #
+###############################################################
+def nth_element(data, k, lo=0, hi=None):
+    """
+    Rearranges data[lo:hi] in place so that data[k] holds the value it
+    would have if the range was sorted, with nothing greater before it
+    and nothing less after it. Uses introselect: quickselect with the
+    usual pivots, and median-of-medians pivots once the partitioning
+    depth exceeds 2 * lg(n), which bounds the time to O(n).
+    :param data:
+    :param k: index of the element to select
+    :param lo: first index of the range
+    :param hi: end (exclusive) of the range, defaults to len(data)
+    :return: the k-th smallest value
+    """
+    if hi is None:
+        hi = len(data)
+    if not lo <= k < hi:
+        raise IndexError("nth_element index out of range")
+
+    depth_limit = 2 * int(math.log2(hi - lo))
+    while hi - lo > INSERTION_SORT_CUTOFF:
+        if depth_limit > 0:
+            depth_limit -= 1
+            pivot_index = _choose_pivot(data, lo, hi)
+        else:
+            pivot_index = _median_of_medians(data, lo, hi)
+
+        lt, gt = _partition3(data, lo, hi, pivot_index)
+        if k < lt:
+            hi = lt
+        elif k > gt:
+            lo = gt + 1
+        else:
+            return data[k]
+
+    InsertionSort.__wrapped__(data, lo, hi)
+    return data[k]
+
+
+def _median_of_medians(data, lo, hi):
+    """
+    Helper function that returns the index of a pivot that is
+    guaranteed to have at least 30% of data[lo:hi] on each side.
+    The medians of groups of five are moved to the front of the
+    range and their median is selected recursively.
+    :param data:
+    :param lo:
+    :param hi:
+    :return:
+    """
+    store = lo
+    for group in range(lo, hi, 5):
+        group_hi = min(group + 5, hi)
+        InsertionSort.__wrapped__(data, group, group_hi)
+        median = (group + group_hi) // 2
+        data[store], data[median] = data[median], data[store]
+        store += 1
+
+    mid = (lo + store) // 2
+    nth_element(data, mid, lo, store)
+    return mid
+
+
+def partial_sort(data, k):
+    """
+    Rearranges the data in place so that data[:k] holds the k smallest
+    values in sorted order. The order of the rest is unspecified.
+    Costs O(n + k * lg(k)) instead of a full sort.
+    :param data:
+    :param k: number of leading elements to sort
+    :return: the data
+    """
+    n = len(data)
+    k = min(k, n)
+    if k <= 0:
+        return data
+
+    if k < n:
+        nth_element(data, k)
+    QuickSort3Way.__wrapped__(data, 0, k)
+    return data
+
+
+def top_k(iterable, k, key=None):
+    """
+    Returns the k largest items of the iterable, largest first. The
+    items are streamed through a bounded min heap, so only O(k) items
+    are kept in memory. Equal items are returned in the order they
+    were seen.
+    :param iterable:
+    :param k:
+    :param key: optional function that extracts the comparison key
+    :return: list of at most k items
+    """
+    if k <= 0:
+        return []
+
+    # The negated position breaks ties in favour of earlier items and
+    # keeps the items themselves out of the comparisons
+    heap = []
+    for order, item in enumerate(iterable):
+        entry = (item if key is None else key(item), -order, item)
+        if len(heap) < k:
+            heap_push(heap, entry)
+        elif heap[0] < entry:
+            heap_replace(heap, entry)
+
+    sort.__wrapped__(heap)
+    heap.reverse()
+    return [entry[2] for entry in heap]
+
+
+###############################################################
+# ShellSort Method                                            #
+###############################################################
+@key_sort()
+def ShellSort(data, gaps="ciura"):
+    """
+    Shell sort method. The data is h-sorted for every gap of the
+    sequence, largest gap first, by insertion sort over elements that
+    are h apart: the element is held aside while larger ones are
+    shifted up by one gap, then written once into the hole. The gap
+    tables are cached per power-of-two size bucket.
+    :param data:
+    :param gaps: name of the gap sequence ("ciura", "tokuda", "sedgewick"
+                 or "exp") or an explicit sequence of gaps
+    :return: the sorted data
+    """
+    n = len(data)
+
+    if isinstance(gaps, str):
+        gaps = gap_table(gaps, n)
+    else:
+        gaps = sorted((gap for gap in gaps if 0 < gap < n), reverse=True)
+        if n > 1 and gaps[-1:] != [1]:
+            gaps.append(1)
+
+    for gap in gaps:
+        # h-insertion sort: shift instead of swapping
+        for idx in range(gap, n):
+            val = data[idx]
+            i = idx
+            while i >= gap and val < data[i - gap]:
+                data[i] = data[i - gap]
+                i -= gap
+            data[i] = val
+
+    return data
+
+
+def gap_table(name, n):
+    """
+    Returns the gaps of the named sequence that are less than n,
+    largest first. Tables are computed once per sequence and
+    power-of-two size bucket and cached.
+    :param name:
+    :param n:
+    :return: tuple of gaps
+    """
+    if name not in GAP_SEQUENCES:
+        raise ValueError("Unknown gap sequence {0}".format(name))
+
+    bucket = n.bit_length()
+    table = _gap_tables.get((name, bucket))
+    if table is None:
+        table = tuple(reversed(GAP_SEQUENCES[name](1 << bucket)))
+        _gap_tables[(name, bucket)] = table
+
+    # Skip the gaps of the bucket that are not less than n
+    start = 0
+    while start < len(table) and table[start] >= n:
+        start += 1
+    return table[start:]
+
+
+def generate_ciura_sequence(length):
+    """
+    Helper function for Shell Sort algorithm. It generates Ciura's
+    experimentally tuned gaps 1, 4, 10, 23, 57, 132, 301, 701, 1750,
+    extended by the factor 2.25.
+    :param length:
+    :return:
+    """
+    sequence = []
+    for val in (1, 4, 10, 23, 57, 132, 301, 701, 1750):
+        if val >= length:
+            return sequence
+        sequence.append(val)
+
+    val = int(sequence[-1] * 2.25)
+    while val < length:
+        sequence.append(val)
+        val = int(val * 2.25)
+
+    return sequence
+
+
+def generate_tokuda_sequence(length):
+    """
+    Helper function for Shell Sort algorithm. It generates Tokuda's
+    sequence ceil((9^k - 4^k) / (5 * 4^(k-1))): 1, 4, 9, 20, 46, 103, ...
+    :param length:
+    :return:
+    """
+    sequence = []
+    k = 1
+    while True:
+        val = -(-(9 ** k - 4 ** k) // (5 * 4 ** (k - 1)))
+        if val >= length:
+            break
+        sequence.append(val)
+        k += 1
+
+    return sequence
+
+
+def generate_sedgewick_sequence(length):
+    """
+    Helper function for Shell Sort algorithm. It generates Sedgewick's
+    sequence 4^k + 3 * 2^(k-1) + 1 prefixed with 1: 1, 8, 23, 77, 281, ...
+    :param length:
+    :return:
+    """
+    sequence = [1] if length > 1 else []
+    k = 1
+    while True:
+        val = 4 ** k + 3 * 2 ** (k - 1) + 1
+        if val >= length:
+            break
+        sequence.append(val)
+        k += 1
+
+    return sequence
+
+
+def generate_increments_sequence(length):
+    """
+    Helper frunction for Shell Sort algorithm.
+    It generates the seqeunce equal to e^(n-2) + 1
+    :param length:
+    :return:
+    """
+    sequence = []
+    idx = 0
+
+    while True:
+        idx += 1
+        val = int(round(math.exp(idx - 2)) + 1)
+        if val >= length:
+            break
+        sequence.append(val)
+
+    return sequence
+
+
+# Gap sequence generators by name
+GAP_SEQUENCES = {
+    "ciura": generate_ciura_sequence,
+    "tokuda": generate_tokuda_sequence,
+    "sedgewick": generate_sedgewick_sequence,
+    "exp": generate_increments_sequence,
+}
+
+# Cached gap tables by (sequence name, size bucket)
+_gap_tables = {}
+
+
+###############################################################
+# Sorting Networks                                            #
+###############################################################
+# Best known (size-optimal up to 10 inputs) sorting networks as layers of
+# independent compare-exchange pairs (i, j), i < j, from Knuth, TAOCP
+# vol. 3 and Bert Dobbelaere's list of smallest sorting networks.
+SORTING_NETWORKS = {
+    1: (),
+    2: (((0, 1),),),
+    3: (((0, 2),), ((0, 1),), ((1, 2),)),
+    4: (((0, 1), (2, 3)), ((0, 2), (1, 3)), ((1, 2),)),
+    5: (((0, 3), (1, 4)), ((0, 2), (1, 3)), ((0, 1), (2, 4)), ((1, 2), (3, 4)), ((2, 3),)),
+    6: (((0, 5), (1, 3), (2, 4)), ((1, 2), (3, 4)), ((0, 3), (2, 5)), ((0, 1), (2, 3), (4, 5)),
+        ((1, 2), (3, 4))),
+    7: (((0, 6), (2, 3), (4, 5)), ((0, 2), (1, 4), (3, 6)), ((0, 1), (2, 5), (3, 4)),
+        ((1, 2), (4, 6)), ((2, 3), (4, 5)), ((1, 2), (3, 4), (5, 6))),
+    8: (((0, 2), (1, 3), (4, 6), (5, 7)), ((0, 4), (1, 5), (2, 6), (3, 7)),
+        ((0, 1), (2, 3), (4, 5), (6, 7)), ((2, 4), (3, 5)), ((1, 4), (3, 6)),
+        ((1, 2), (3, 4), (5, 6))),
+    9: (((0, 3), (1, 7), (2, 5), (4, 8)), ((0, 7), (2, 4), (3, 8), (5, 6)),
+        ((0, 2), (1, 3), (4, 5), (7, 8)), ((1, 4), (3, 6), (5, 7)),
+        ((0, 1), (2, 4), (3, 5), (6, 8)), ((2, 3), (4, 5), (6, 7)), ((1, 2), (3, 4), (5, 6))),
+    10: (((0, 8), (1, 9), (2, 7), (3, 5), (4, 6)), ((0, 2), (1, 4), (5, 8), (7, 9)),
+         ((0, 3), (2, 4), (5, 7), (6, 9)), ((0, 1), (3, 6), (8, 9)),
+         ((1, 5), (2, 3), (4, 8), (6, 7)), ((1, 2), (3, 5), (4, 6), (7, 8)),
+         ((2, 3), (4, 5), (6, 7)), ((3, 4), (5, 6))),
+    11: (((0, 9), (1, 6), (2, 4), (3, 7), (5, 8)), ((0, 1), (3, 5), (4, 10), (6, 9), (7, 8)),
+         ((1, 3), (2, 5), (4, 7), (8, 10)), ((0, 4), (1, 2), (3, 7), (5, 9), (6, 8)),
+         ((0, 1), (2, 6), (4, 5), (7, 8), (9, 10)), ((2, 4), (3, 6), (5, 7), (8, 9)),
+         ((1, 2), (3, 4), (5, 6), (7, 8)), ((2, 3), (4, 5), (6, 7))),
+    12: (((0, 8), (1, 7), (2, 6), (3, 11), (4, 10), (5, 9)),
+         ((0, 1), (2, 5), (3, 4), (6, 9), (7, 8), (10, 11)), ((0, 2), (1, 6), (5, 10), (9, 11)),
+         ((0, 3), (1, 2), (4, 6), (5, 7), (8, 11), (9, 10)), ((1, 4), (3, 5), (6, 8), (7, 10)),
+         ((1, 3), (2, 5), (6, 9), (8, 10)), ((2, 3), (4, 5), (6, 7), (8, 9)), ((4, 6), (5, 7)),
+         ((3, 4), (5, 6), (7, 8))),
+    13: (((0, 12), (1, 10), (2, 9), (3, 7), (5, 11), (6, 8)),
+         ((1, 6), (2, 3), (4, 11), (7, 9), (8, 10)),
+         ((0, 4), (1, 2), (3, 6), (7, 8), (9, 10), (11, 12)), ((4, 6), (5, 9), (8, 11), (10, 12)),
+         ((0, 5), (3, 8), (4, 7), (6, 11), (9, 10)), ((0, 1), (2, 5), (6, 9), (7, 8), (10, 11)),
+         ((1, 3), (2, 4), (5, 6), (9, 10)), ((1, 2), (3, 4), (5, 7), (6, 8)),
+         ((2, 3), (4, 5), (6, 7), (8, 9)), ((3, 4), (5, 6))),
+    16: (((0, 13), (1, 12), (2, 15), (3, 14), (4, 8), (5, 6), (7, 11), (9, 10)),
+         ((0, 5), (1, 7), (2, 9), (3, 4), (6, 13), (8, 14), (10, 15), (11, 12)),
+         ((0, 1), (2, 3), (4, 5), (6, 8), (7, 9), (10, 11), (12, 13), (14, 15)),
+         ((0, 2), (1, 3), (4, 10), (5, 11), (6, 7), (8, 9), (12, 14), (13, 15)),
+         ((1, 2), (3, 12), (4, 6), (5, 7), (8, 10), (9, 11), (13, 14)),
+         ((1, 4), (2, 6), (5, 8), (7, 10), (9, 13), (11, 14)),
+         ((2, 4), (3, 6), (9, 12), (11, 13)), ((3, 5), (6, 8), (7, 9), (10, 12)),
+         ((3, 4), (5, 6), (7, 8), (9, 10), (11, 12)), ((6, 7), (8, 9))),
+}
+
+
+def prune_network(layers, n):
+    """
+    Helper function that restricts a sorting network to its first n
+    wires. The dropped wires act as +infinity inputs, which never move,
+    so every comparator touching them can be removed.
+    :param layers:
+    :param n:
+    :return: layers of the smaller network
+    """
+    pruned = (tuple(pair for pair in layer if pair[1] < n) for layer in layers)
+    return tuple(layer for layer in pruned if layer)
+
+
+# The 15 and 14 input networks of the 16 input one are also the best known
+SORTING_NETWORKS[15] = prune_network(SORTING_NETWORKS[16], 15)
+SORTING_NETWORKS[14] = prune_network(SORTING_NETWORKS[16], 14)
+
+
+def sorting_network(n):
+    """
+    Returns the sorting network for n inputs as layers of independent
+    (i, j) compare-exchange pairs: a best known network for n <= 16,
+    otherwise Batcher's odd-even merge sort network for the next power
+    of two pruned to n wires.
+    :param n:
+    :return:
+    """
+    network = SORTING_NETWORKS.get(n)
+    if network is None:
+        size = 1 << (n - 1).bit_length()
+        network = prune_network(_batcher_network(size), n)
+        SORTING_NETWORKS[n] = network
+    return network
+
+
+def _batcher_network(size):
+    """
+    Helper function that builds Batcher's odd-even merge sort network
+    for a power of two size, as layers of compare-exchange pairs.
+    :param size:
+    :return:
+    """
+    layers = []
+    p = 1
+    while p < size:
+        k = p
+        while k >= 1:
+            layer = []
+            for j in range(k % p, size - k, 2 * k):
+                for i in range(min(k, size - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p):
+                        layer.append((i + j, i + j + k))
+            layers.append(tuple(layer))
+            k //= 2
+        p *= 2
+    return tuple(layers)
+
+
+@key_sort()
+def NetworkSort(data, lo=0, hi=None):
+    """
+    Sorts data[lo:hi] by applying the sorting network for its length.
+    The sequence of comparisons is fixed, which makes it a cheap base
+    case for small ranges of the divide-and-conquer sorts.
+    :param data:
+    :param lo: first index of the range to sort
+    :param hi: end (exclusive) of the range, defaults to len(data)
+    :return:
+    """
+    if hi is None:
+        hi = len(data)
+
+    for layer in sorting_network(hi - lo):
+        for i, j in layer:
+            a = data[lo + i]
+            b = data[lo + j]
+            if b < a:
+                data[lo + i] = b
+                data[lo + j] = a
+
+    return
+
+
+def SortRows(rows, return_permutation=False):
+    """
+    Sorts every row of a 2-D numpy array at once. Every comparator of
+    the sorting network for the row length is one vectorized min/max
+    compare-exchange over all rows, which removes the per-array
+    interpreter overhead of sorting millions of tiny arrays. NaNs are
+    sorted to the end of their rows, like np.sort does.
+    :param rows: 2-D array, one array to sort per row
+    :param return_permutation: also return the per-row permutations
+                               (like np.argsort along the rows)
+    :return: sorted copy, or (sorted copy, permutations)
+    """
+    if np is None:
+        raise ImportError("SortRows requires numpy")
+
+    rows = np.asarray(rows)
+    if rows.ndim != 2:
+        raise ValueError("SortRows sorts the rows of a 2-D array")
+
+    # Work on the transpose, so that every wire is a contiguous array
+    wires = rows.T.copy()
+    n = wires.shape[0]
+    perm = None
+    if return_permutation:
+        perm = np.repeat(np.arange(n, dtype=np.intp), rows.shape[0]).reshape(n, rows.shape[0])
+
+    # min/max propagate NaN, so float rows are swapped with a mask that
+    # also moves a NaN behind every number
+    nan_aware = wires.dtype.kind == "f"
+
+    # Scratch rows reused by every compare-exchange
+    low = np.empty(rows.shape[0], dtype=wires.dtype)
+    swap = np.empty(rows.shape[0], dtype=bool)
+    nan_i = np.empty(rows.shape[0], dtype=bool)
+    nan_j = np.empty(rows.shape[0], dtype=bool)
+    index = np.empty(rows.shape[0], dtype=np.intp)
+
+    for layer in sorting_network(n):
+        for i, j in layer:
+            if perm is None and not nan_aware:
+                np.minimum(wires[i], wires[j], out=low)
+                np.maximum(wires[i], wires[j], out=wires[j])
+                wires[i] = low
+                continue
+
+            np.less(wires[j], wires[i], out=swap)
+            if nan_aware:
+                np.isnan(wires[i], out=nan_i)
+                np.isnan(wires[j], out=nan_j)
+                np.greater(nan_i, nan_j, out=nan_i)
+                np.logical_or(swap, nan_i, out=swap)
+            low[:] = wires[i]
+            np.copyto(wires[i], wires[j], where=swap)
+            np.copyto(wires[j], low, where=swap)
+            if perm is not None:
+                index[:] = perm[i]
+                np.copyto(perm[i], perm[j], where=swap)
+                np.copyto(perm[j], index, where=swap)
+
+    result = np.ascontiguousarray(wires.T)
+    if return_permutation:
+        return result, np.ascontiguousarray(perm.T)
+    return result
+
+
+###############################################################
+# Instrumentation                                             #
+###############################################################
+class SortStats:
+    """
+    This class describes the counters collected for a sort algorithm.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.comparisons = 0
+        # Only writes into the sorted list itself, see CountingList
+        self.input_writes = 0
+        # Deepest recursion of a single function, 1 when nothing recurses
+        self.max_depth = 0
+        self.peak_memory = 0
+        self.wall_time = 0.0
+
+    def add(self, other):
+        """
+        Accumulates the counters of another run into this one.
+        :param other:
+        :return:
+        """
+        self.calls += other.calls
+        self.comparisons += other.comparisons
+        self.input_writes += other.input_writes
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.peak_memory = max(self.peak_memory, other.peak_memory)
+        self.wall_time += other.wall_time
+        return
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return ("{0}: calls={1} comparisons={2} input_writes={3} max_depth={4} "
+                "peak_memory={5}B wall_time={6:.6f}s").format(
+            self.name, self.calls, self.comparisons, self.input_writes,
+            self.max_depth, self.peak_memory, self.wall_time)
+
+
+class CountingItem:
+    """
+    Comparator wrapper: every rich comparison between two wrapped
+    values increments the comparison counter of the stats.
+    """
+    __slots__ = ("value", "stats")
+
+    def __init__(self, value, stats):
+        self.value = value
+        self.stats = stats
+
+    def __lt__(self, other):
+        self.stats.comparisons += 1
+        return self.value < other.value
+
+    def __le__(self, other):
+        self.stats.comparisons += 1
+        return self.value <= other.value
+
+    def __gt__(self, other):
+        self.stats.comparisons += 1
+        return self.value > other.value
+
+    def __ge__(self, other):
+        self.stats.comparisons += 1
+        return self.value >= other.value
+
+    def __eq__(self, other):
+        self.stats.comparisons += 1
+        return self.value == other.value
+
+    def __ne__(self, other):
+        self.stats.comparisons += 1
+        return self.value != other.value
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "CountingItem({0!r})".format(self.value)
+
+
+class CountingList(list):
+    """
+    List that counts the elements written into it. Only the list that
+    is being sorted is wrapped: writes into auxiliary buffers (merge
+    buffers, Timsort's tmp, the new lists of the out-of-place sorts)
+    are not seen, so the counter is not the total number of element
+    moves and can't compare in-place and buffered algorithms.
+    """
+    __slots__ = ("stats",)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            self.stats.input_writes += len(value)
+        else:
+            self.stats.input_writes += 1
+        super().__setitem__(index, value)
+
+
+class SortProfiler:
+    """
+    This class collects per-algorithm counters of the comparison sorts.
+    It is used as a context manager:
+
+        with SortProfiler(track_depth=True) as profiler:
+            profiler.run(QuickSort3Way, data)
+        print(profiler.stats["QuickSort3Way"])
+
+    Every run wraps the elements with CountingItem, sorts a CountingList
+    and unwraps the result. A key or reverse order is applied by the
+    profiler itself: the (key, position) pairs are wrapped as a whole,
+    so every comparison of two pairs counts once, exactly as many as
+    the algorithm makes. The optional hook is called with the stats
+    of every run. Recursion depth is traced with sys.setprofile and
+    peak memory with tracemalloc; both slow the run down and are off
+    by default.
+    """
+    def __init__(self, hook=None, track_memory=False, track_depth=False):
+        self.hook = hook
+        self.track_memory = track_memory
+        self.track_depth = track_depth
+        self.stats = {}
+        self._depths = {}
+        self._max_depth = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def run(self, sort_func, data, *args, name=None, **kwargs):
+        """
+        Runs the sort function on the data and records its counters.
+        In-place sorts leave the sorted values in the data.
+        :param sort_func:
+        :param data: list to sort
+        :param args: extra arguments of the sort function
+        :param name: counter name, defaults to the function name
+        :param kwargs: extra keyword arguments of the sort function
+        :return: the sorted values
+        """
+        name = name or sort_func.__name__
+        run_stats = SortStats(name)
+        run_stats.calls = 1
+
+        # Comparing (CountingItem, position) tuples would call __eq__ and
+        # then __lt__, counting one comparison twice
+        key = kwargs.pop("key", None)
+        reverse = kwargs.pop("reverse", False)
+        values = data
+        if key is not None or reverse:
+            values = decorate(data, key, reverse)
+
+        items = CountingList([CountingItem(value, run_stats) for value in values])
+        items.stats = run_stats
+
+        if self.track_memory:
+            tracemalloc.start()
+        if self.track_depth:
+            self._depths = {}
+            self._max_depth = 0
+            sys.setprofile(self._trace_depth)
+
+        start = time.perf_counter()
+        try:
+            result = sort_func(items, *args, **kwargs)
+        finally:
+            run_stats.wall_time = time.perf_counter() - start
+            if self.track_depth:
+                sys.setprofile(None)
+                run_stats.max_depth = self._max_depth
+            if self.track_memory:
+                run_stats.peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        in_place = result is None or result is items
+        values = [item.value for item in (items if in_place else result)]
+        if key is not None or reverse:
+            values = undecorate(values, data, reverse)
+        if in_place:
+            data[:] = values
+
+        self.stats.setdefault(name, SortStats(name)).add(run_stats)
+        if self.hook is not None:
+            self.hook(run_stats)
+        return values
+
+    def _trace_depth(self, frame, event, arg):
+        """
+        Profile function that tracks the recursion depth of every
+        function of this module separately, so a sort calling its
+        helpers or another sort for the base case doesn't count as
+        recursion.
+        :param frame:
+        :param event:
+        :param arg:
+        :return:
+        """
+        code = frame.f_code
+        if code in _ALGORITHM_CODES:
+            if event == "call":
+                depth = self._depths.get(code, 0) + 1
+                self._depths[code] = depth
+                if depth > self._max_depth:
+                    self._max_depth = depth
+            elif event == "return":
+                self._depths[code] -= 1
+
+
+# Code objects of the module functions whose recursion is traced
+_ALGORITHM_CODES = frozenset(
+    inspect.unwrap(func).__code__ for func in list(globals().values())
+    if inspect.isfunction(func) and func.__module__ == __name__)
 
 
 ###############################################################
@@ -329,5 +2528,9 @@ if __name__ == "__main__":
     #data_array = QuickSortSimple(data_array)
     #data_array = MergeSortSimple(data_array)
     data_array = ShellSort(data_array)
+    #data_array = sort(data_array)
+    #data_array = QuickSort3Way(data_array)
+    #data_array = MergeSortBottomUp(data_array)
+    #data_array = TimSort(data_array)
 
     print("Sorted Data = {0}".format(data_array))
\ No newline at end of file
@@ -2,15 +2,40 @@
 This module represents trees implementation.
 """
 
+from array import array
+from collections import deque
+
 
 class BinaryTreeElement:
     """
-    This class describes a binary tree element
+    This class describes a binary tree element. The attributes live in
+    slots instead of a per-instance __dict__, which makes every node
+    considerably smaller and the attribute access faster; the tree
+    code reads the attributes directly rather than through the getters.
+    Every element stores the height of its subtree, computed from the
+    children it is created with and kept up to date by the search trees.
+    The setters update the element itself, but not its ancestors: a
+    tree linked by hand is either built bottom-up or repaired with
+    validate(repair=True) afterwards.
     """
+    __slots__ = ("data", "left", "right", "height")
+
     def __init__(self, data=None, left=None, right=None):
         self.data = data
         self.left = left
         self.right = right
+        self.update()
+
+    def update(self):
+        """
+        Recomputes the stored height from the children. Direct writes
+        to left and right don't call it.
+        :return:
+        """
+        left_height = self.left.height if self.left else 0
+        right_height = self.right.height if self.right else 0
+        self.height = 1 + (left_height if left_height > right_height else right_height)
+        return
 
     def set_value(self, data):
         self.data = data
@@ -20,12 +45,14 @@ class BinaryTreeElement:
 
     def set_left(self, left):
         self.left = left
+        self.update()
 
     def get_left(self):
         return self.left
 
     def set_right(self, right):
         self.right = right
+        self.update()
 
     def get_right(self):
         return self.right
@@ -36,19 +63,290 @@ class BinaryTreeElement:
 
 class BinaryTree:
     """
-    This class describes a binary tree
+    This class describes a binary tree. The traversals are generators
+    that walk the tree with an explicit stack (or none at all in the
+    Morris mode), so they stream the values of arbitrarily deep trees
+    without building lists or hitting the recursion limit. The tree
+    must not be modified while a traversal is running.
+    A Morris traversal threads the right pointers of the tree while it
+    runs, so while its generator is paused no other access to the tree
+    is safe: the lookups, updates and traversals of the tree raise
+    RuntimeError until the walk finishes or the generator is closed.
     """
+    # Node attributes that are derived from the subtree
+    stored_fields = ("height",)
+    # Set while a paused Morris traversal keeps threads in the tree
+    threaded = False
+
     def __init__(self):
         self.root = None
 
+    def __iter__(self):
+        return self.inorder()
+
+    def lca_index(self, by_value=False):
+        """
+        Builds the lowest common ancestor index of the current tree.
+        :param by_value: query by values instead of nodes
+        :return: LCAIndex
+        """
+        return LCAIndex(self, by_value)
+
+    def inorder(self, morris=False):
+        """
+        Generator of the values inorder:
+        > all_left -> middle -> all right
+        :param morris: walk in O(1) extra memory by temporarily threading
+                       the right pointers of the inorder predecessors;
+                       the tree can't be used until the walk is done
+        :return:
+        """
+        if morris:
+            return self._morris(self.root, preorder=False)
+        return self._inorder(self.root)
+
+    def preorder(self, morris=False):
+        """
+        Generator of the values preorder:
+        > root > left > right
+        :param morris: walk in O(1) extra memory (see inorder)
+        :return:
+        """
+        if morris:
+            return self._morris(self.root, preorder=True)
+        return self._preorder(self.root)
+
+    def postorder(self):
+        """
+        Generator of the values postorder:
+        > left > right > root
+        :return:
+        """
+        return self._postorder(self.root)
+
+    def level_order(self):
+        """
+        Generator of the values level by level, left to right.
+        :return:
+        """
+        return self._level_order(self.root)
+
+    def _inorder(self, node):
+        """
+        Helper generator of the values of the subtree in inorder.
+        :param node:
+        :return:
+        """
+        self._check_threads()
+        stack = []
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.data
+            node = node.right
+
+    def _preorder(self, node):
+        """
+        Helper generator of the values of the subtree in preorder.
+        :param node:
+        :return:
+        """
+        self._check_threads()
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            yield node.data
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+    def _postorder(self, node):
+        """
+        Helper generator of the values of the subtree in postorder. A
+        node is visited once its right subtree is done, which is when
+        the previously visited node is its right child.
+        :param node:
+        :return:
+        """
+        self._check_threads()
+        stack = []
+        last = None
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            top = stack[-1]
+            if top.right and top.right is not last:
+                node = top.right
+            else:
+                stack.pop()
+                yield top.data
+                last = top
+
+    def _level_order(self, node):
+        """
+        Helper generator of the values of the subtree in level order.
+        :param node:
+        :return:
+        """
+        self._check_threads()
+        queue = deque([node] if node else [])
+        while queue:
+            node = queue.popleft()
+            yield node.data
+            if node.left:
+                queue.append(node.left)
+            if node.right:
+                queue.append(node.right)
+
+    def _morris(self, node, preorder):
+        """
+        Helper generator of the Morris traversal. The tree is marked
+        as threaded from the first step until the walk is done. When the
+        consumer stops early the walk is finished silently, which
+        removes the remaining threads and leaves the tree as it was.
+        :param node:
+        :param preorder: visit the nodes preorder instead of inorder
+        :return:
+        """
+        self._check_threads()
+        self.threaded = True
+        try:
+            while node:
+                node, visited = self._morris_step(node, preorder)
+                if visited is not None:
+                    yield visited.data
+        finally:
+            while node:
+                node, _ = self._morris_step(node, preorder)
+            self.threaded = False
 
-class BinarySearchTree:
+    def _check_threads(self):
+        """
+        Helper method that refuses to walk the tree while a paused
+        Morris traversal has turned some right pointers into cycles.
+        :return:
+        """
+        if self.threaded:
+            raise RuntimeError("The tree is in use by a paused Morris traversal")
+        return
+
+    @staticmethod
+    def _morris_step(node, preorder):
+        """
+        Helper method that performs one step of the Morris traversal.
+        :param node:
+        :param preorder:
+        :return: (next node, visited node or None)
+        """
+        if node.left is None:
+            return node.right, node
+
+        # Find the inorder predecessor, the rightmost node on the left
+        predecessor = node.left
+        while predecessor.right and predecessor.right is not node:
+            predecessor = predecessor.right
+
+        if predecessor.right is None:
+            # Thread the predecessor back to the node and go left
+            predecessor.right = node
+            return node.left, node if preorder else None
+
+        # The left subtree is done, remove the thread
+        predecessor.right = None
+        return node.right, None if preorder else node
+
+    def validate(self, repair=False):
+        """
+        Audit mode: recomputes the data every node stores about its
+        subtree (see stored_fields) from scratch, children before
+        parents, and compares it with the stored values. This is O(n)
+        and meant for tests and health checks, the operations of the
+        search trees never need it. A tree linked by hand, through the
+        node setters or by writing left and right directly, gets its
+        stored values fixed with repair=True.
+        :param repair: fix wrong stored values instead of raising
+        :return: number of repaired nodes
+        """
+        self._check_threads()
+        # Reversed preorder visits every node after its descendants
+        nodes = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            if node.left:
+                stack.append(node.left)
+            if node.right:
+                stack.append(node.right)
+
+        repaired = 0
+        for node in reversed(nodes):
+            stored = [getattr(node, field) for field in self.stored_fields]
+            self._update(node)
+            actual = [getattr(node, field) for field in self.stored_fields]
+            if stored != actual:
+                if not repair:
+                    for field, value in zip(self.stored_fields, stored):
+                        setattr(node, field, value)
+                    raise ValueError("Node {0} stores {1} = {2}, expected {3}".format(
+                        node, self.stored_fields, stored, actual))
+                repaired += 1
+            self._check_node(node)
+        return repaired
+
+    def _update(self, node):
+        """
+        Helper method that recomputes the data a node keeps about its
+        subtree, the height, after its children changed.
+        :param node:
+        :return:
+        """
+        left = node.left.height if node.left else 0
+        right = node.right.height if node.right else 0
+        node.height = 1 + (left if left > right else right)
+        return
+
+    def _check_node(self, node):
+        """
+        Helper hook of validate for invariants of a subclass.
+        :param node:
+        :return:
+        """
+        return
+
+
+class BinarySearchTree(BinaryTree):
     """
     This class describes a binary search tree
     """
+    # Node type created by the tree
+    element_class = BinaryTreeElement
+
     def __init__(self):
         self.root = None
 
+    @classmethod
+    def from_sorted(cls, iterable):
+        """
+        Builds a perfectly balanced tree from values in ascending
+        order in O(n): the middle value becomes the root and the two
+        halves become its subtrees.
+        :param iterable: values in ascending order
+        :return: the new tree
+        """
+        values = list(iterable)
+        for i in range(1, len(values)):
+            if values[i] < values[i - 1]:
+                raise ValueError("from_sorted needs the values in ascending order")
+
+        tree = cls()
+        tree.root = tree._build_balanced(values, 0, len(values))
+        return tree
+
     def __str__(self):
         """
         This method performs in-order traversal and
@@ -57,40 +355,109 @@ class BinarySearchTree:
         """
         self.print_inorder(self.root)
 
+    def __contains__(self, data):
+        return self.search(data) is not None
+
     def get_root(self):
         return self.root
 
+    def search(self, data):
+        """
+        Returns the node that holds the data, or None.
+        :param data:
+        :return:
+        """
+        self._check_threads()
+        node = self.root
+        while node:
+            if data < node.data:
+                node = node.left
+            elif node.data < data:
+                node = node.right
+            else:
+                return node
+        return None
+
     def insert(self, data):
         """
         Inserts the object into the sorted binary tree.
         :param data:
         :return:
         """
-        new_element = BinaryTreeElement(data)
+        self._check_threads()
+        new_element = self.element_class(data)
 
         # Consider a special case for empty tree
         if self.root is None:
             self.root = new_element
-        else:
-            # Determine the palce for the node
-            current_node = self.root
-            while True:
-                if data < current_node.data:
-                    # If the value is less then the data has to be
-                    # placed in the left branch
-                    if not current_node.left:
-                        current_node.left = new_element
-                        break
-                    else:
-                        current_node = current_node.left
+            return
+
+        # Determine the place for the node, remembering the path
+        path = []
+        current_node = self.root
+        while True:
+            path.append(current_node)
+            if data < current_node.data:
+                # If the value is less then the data has to be
+                # placed in the left branch
+                if not current_node.left:
+                    current_node.left = new_element
+                    break
                 else:
-                    # If the data is more than current node,
-                    #  place it into the right branch
-                    if not current_node.right:
-                        current_node.right = new_element
-                        break
-                    else:
-                        current_node = current_node.right
+                    current_node = current_node.left
+            else:
+                # If the data is more than current node,
+                #  place it into the right branch
+                if not current_node.right:
+                    current_node.right = new_element
+                    break
+                else:
+                    current_node = current_node.right
+
+        self._update_path(path)
+        return
+
+    def delete(self, data):
+        """
+        Removes one occurrence of the data from the tree. A node with
+        two children takes the data of its in-order successor, which
+        is then unlinked instead.
+        :param data:
+        :return:
+        """
+        self._check_threads()
+        path = []
+        node = self.root
+        while node:
+            if data < node.data:
+                path.append(node)
+                node = node.left
+            elif node.data < data:
+                path.append(node)
+                node = node.right
+            else:
+                break
+        if node is None:
+            raise KeyError("{0} is not in the tree".format(data))
+
+        if node.left and node.right:
+            # Find the in-order successor, the minimum of the right subtree
+            path.append(node)
+            successor = node.right
+            while successor.left:
+                path.append(successor)
+                successor = successor.left
+            node.data = successor.data
+            node = successor
+
+        child = node.left if node.left else node.right
+        if not path:
+            self.root = child
+        elif path[-1].left is node:
+            path[-1].left = child
+        else:
+            path[-1].right = child
+        self._update_path(path)
         return
 
     def print_inorder(self, node):
@@ -99,11 +466,8 @@ class BinarySearchTree:
         > all_left -> middle -> all right
         :return:
         """
-        if node:
-            self.print_inorder(node.left)
-            print(node.data)
-            self.print_inorder(node.right)
-
+        for data in self._inorder(node):
+            print(data)
 
     def print_preorder(self, node):
         """
@@ -111,21 +475,17 @@ class BinarySearchTree:
         > root > left > right
         :return:
         """
-        if node:
-            print(node.data)
-            self.print_preorder(node.left)
-            self.print_preorder(node.right)
+        for data in self._preorder(node):
+            print(data)
 
     def print_postorder(self, node):
         """
-        Prints the tree preorder:
-        > root > left > right
+        Prints the tree postorder:
+        > left > right > root
         :return:
         """
-        if node:
-            self.print_postorder(node.left)
-            self.print_postorder(node.right)
-            print(node.data)
+        for data in self._postorder(node):
+            print(data)
 
     def print_preorder_iterative(self, node):
         """
@@ -133,6 +493,7 @@ class BinarySearchTree:
         > left > right > root
         :return:
         """
+        self._check_threads()
         if node is None:
             return
         else:
@@ -141,24 +502,21 @@ class BinarySearchTree:
 
             while len(queue):
                 node = queue.pop(-1)
-                print (node.get_value())
-                if node.get_right():
-                    queue.append(node.get_right())
-                if node.get_left():
-                    queue.append(node.get_left())
+                print (node.data)
+                if node.right:
+                    queue.append(node.right)
+                if node.left:
+                    queue.append(node.left)
 
     def get_max_depth(self, node):
         """
-        This method calculates the tree depth.
+        This method returns the depth of the subtree, which every node
+        stores, so it costs O(1). Nodes linked by hand have the right
+        heights after validate(repair=True).
         :param node:
         :return:
         """
-        if node:
-            return 1 + max(self.get_max_depth(node.left),
-                           self.get_max_depth(node.right))
-        else:
-            return 0
-
+        return node.height if node else 0
 
     def find_lowest_common_ancestor(self, root, data1, data2):
         """
@@ -166,83 +524,946 @@ class BinarySearchTree:
         nodes that exist in the tree and you need to find a lowest
         common ancestor. Knowing the property of the BST the lowest
         common ancestor will be a value that is in between data1
-        and data 2
+        and data 2. Every call walks from the root, for many queries
+        build an LCAIndex once instead.
         :param root:
         :param data1:
         :param data2:
         :return:
         """
+        self._check_threads()
         node = root
         while node:
             # Return is the tree is empty or values don't exist
             if node is None:
                 return None
 
-            if node.get_value() < data1 and node.get_value() < data2:
-                node = node.get_right()
-            elif node.get_value() > data1 and node.get_value() > data2:
-                node = node.get_left()
+            if node.data < data1 and node.data < data2:
+                node = node.right
+            elif node.data > data1 and node.data > data2:
+                node = node.left
             else:
                 return node
 
     def get_balance_factor(self, root):
         """
         This method calculates the balance factor of the tree of
-        the subtree for the specified root.
+        the subtree for the specified root from the stored heights
+        of its children, in O(1).
         :return:
         """
         if root is None:
             return None
         else:
-            return self.get_max_depth(root.get_right()) - self.get_max_depth(root.get_left())
+            return self.get_max_depth(root.right) - self.get_max_depth(root.left)
 
     def rotate_right(self, node):
         """
-        This method rotates the tree to the right.
+        This method rotates the subtree to the right: the left child
+        becomes the root of the subtree. The caller attaches the
+        returned root to the parent and updates the ancestors.
         :param node:
-        :return:
+        :return: the new root of the subtree
         """
-        new_root = node.get_right()
-        node.set_right(new_root.get_left())
-        new_root.set_left(node)
+        new_root = node.left
+        node.left = new_root.right
+        new_root.right = node
+        self._update(node)
+        self._update(new_root)
         return new_root
 
     def rotate_left(self, node):
         """
-        This method rotates the tree to the left.
+        This method rotates the subtree to the left: the right child
+        becomes the root of the subtree. The caller attaches the
+        returned root to the parent and updates the ancestors.
         :param node:
-        :return:
+        :return: the new root of the subtree
         """
-        new_root = node.get_left()
-        node.set_left(new_root.get_right())
-        new_root.set_right(node)
+        new_root = node.right
+        node.right = new_root.left
+        new_root.left = node
+        self._update(node)
+        self._update(new_root)
         return new_root
 
-    def traverse_tree(self):
+    def traverse_tree(self, order="inorder", morris=False):
         """
         This method traverses the tree
+        :param order: "inorder", "preorder", "postorder" or "level_order"
+        :param morris: use the O(1) memory walk (inorder and preorder)
+        :return: generator of the values
+        """
+        if order == "inorder":
+            return self.inorder(morris)
+        if order == "preorder":
+            return self.preorder(morris)
+        if morris:
+            raise ValueError("Morris traversal supports inorder and preorder only")
+        if order == "postorder":
+            return self.postorder()
+        if order == "level_order":
+            return self.level_order()
+        raise ValueError("Unknown traversal order {0!r}".format(order))
+
+    def range(self, lo, hi):
+        """
+        Generator of the values v with lo <= v < hi in ascending order.
+        :param lo:
+        :param hi:
         :return:
         """
-        pass
+        return self.irange(lo, hi, inclusive=(True, False))
 
-    def balance_tree(self, node):
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True), reverse=False):
         """
-        This method re-balances the tree by applying tree rotations
+        Generator of the values between minimum and maximum. Subtrees
+        entirely outside the bounds are never entered, so the cost is
+        O(h + k) for k values in a tree of height h.
+        :param minimum: lower bound, None for no bound
+        :param maximum: upper bound, None for no bound
+        :param inclusive: pair of flags, whether the bounds are included
+        :param reverse: iterate from the largest value down
         :return:
         """
+        self._check_threads()
+
+        def below(data):
+            if minimum is None:
+                return False
+            return data < minimum if inclusive[0] else not minimum < data
+
+        def above(data):
+            if maximum is None:
+                return False
+            return maximum < data if inclusive[1] else not data < maximum
+
+        # Walk inorder (or reversed inorder) from the first value in the
+        # range: a node outside the near bound is skipped together with
+        # its near subtree, and the walk ends at the first value past the
+        # far bound.
+        if reverse:
+            below, above = above, below
+        stack = []
+        node = self.root
+        while True:
+            while node:
+                if below(node.data):
+                    node = node.left if reverse else node.right
+                else:
+                    stack.append(node)
+                    node = node.right if reverse else node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if above(node.data):
+                return
+            yield node.data
+            node = node.left if reverse else node.right
+
+    def balance_tree(self, node):
+        """
+        This method re-balances the subtree with the Day-Stout-Warren
+        algorithm (see rebalance), so the depths of the two subtrees of
+        every node differ by at most one. It runs in O(n) for a subtree
+        of n nodes without recursion, even on a degenerate chain. When
+        the node is the root the tree root is replaced, otherwise the
+        caller attaches the returned root to the parent and updates the
+        ancestors.
+        :param node:
+        :return: the new root of the subtree
+        """
+        self._check_threads()
         if node is None:
-            return
+            return None
+
+        new_root = self._balance_subtree(node)
+        if node is self.root:
+            self.root = new_root
+        return new_root
+
+    def rebalance(self):
+        """
+        This method rebalances the whole tree in O(n) time and O(1)
+        extra space with the Day-Stout-Warren algorithm:
+            1. right rotations turn the tree into a "vine", a linked
+               list along the right children, in sorted order;
+            2. left rotations at every other vine node compress the
+               vine, first the nodes that don't fit a complete tree,
+               then halving passes until the tree is balanced.
+        Every level of the result is full except possibly the last.
+        :return:
+        """
+        self._check_threads()
+        self.root = self._balance_subtree(self.root)
+        return
+
+    def _balance_subtree(self, node):
+        """
+        Helper method that rebalances the subtree with the
+        Day-Stout-Warren algorithm.
+        :param node:
+        :return: the new root of the subtree
+        """
+        pseudo_root = self.element_class()
+        pseudo_root.right = node
+        size = self._tree_to_vine(pseudo_root)
+
+        # Number of nodes in the largest complete tree that fits
+        complete = (1 << (size + 1).bit_length() - 1) - 1
+        self._compress(pseudo_root, size - complete)
+        while complete > 1:
+            complete //= 2
+            self._compress(pseudo_root, complete)
+
+        # The nodes left on the right spine were never moved down, so
+        # update them from the bottom up
+        spine = []
+        node = pseudo_root.right
+        while node:
+            spine.append(node)
+            node = node.right
+        for node in reversed(spine):
+            self._update(node)
+
+        return pseudo_root.right
+
+    def _tree_to_vine(self, pseudo_root):
+        """
+        Helper method that turns the tree below the pseudo root into a
+        vine with right rotations.
+        :param pseudo_root:
+        :return: number of nodes
+        """
+        size = 0
+        tail = pseudo_root
+        rest = tail.right
+        while rest:
+            if rest.left is None:
+                tail = rest
+                rest = rest.right
+                size += 1
+            else:
+                new_root = rest.left
+                rest.left = new_root.right
+                new_root.right = rest
+                rest = new_root
+                tail.right = new_root
+        return size
+
+    def _compress(self, pseudo_root, count):
+        """
+        Helper method that performs count left rotations at every other
+        node of the vine below the pseudo root.
+        :param pseudo_root:
+        :param count:
+        :return:
+        """
+        scanner = pseudo_root
+        for _ in range(count):
+            child = scanner.right
+            scanner.right = child.right
+            scanner = scanner.right
+            child.right = scanner.left
+            scanner.left = child
+            self._update(child)
+        return
+
+    def _build_balanced(self, values, lo, hi):
+        """
+        Helper method that builds a balanced subtree of values[lo:hi].
+        :param values:
+        :param lo:
+        :param hi:
+        :return: the root of the subtree
+        """
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = self.element_class(values[mid],
+                                  self._build_balanced(values, lo, mid),
+                                  self._build_balanced(values, mid + 1, hi))
+        self._update(node)
+        return node
+
+    def validate(self, repair=False):
+        """
+        Audit mode: recomputes the stored node data (see
+        BinaryTree.validate) and also checks the search tree order.
+        :param repair: fix wrong stored values instead of raising
+        :return: number of repaired nodes
+        """
+        repaired = super().validate(repair)
 
+        previous = None
+        for i, data in enumerate(self._inorder(self.root)):
+            if i and data < previous:
+                raise ValueError("Value {0} follows {1} in the tree order".format(data, previous))
+            previous = data
+        return repaired
+
+    def _update_path(self, path):
+        """
+        Helper method that updates the nodes of the path, from the root
+        down, after the tree below its last node changed. It stops at
+        the first node whose height doesn't change, its ancestors
+        can't change either.
+        :param path: list of nodes from the root down
+        :return:
+        """
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            height = node.height
+            self._update(node)
+            if node.height == height:
+                break
+        return
+
+
+class AVLTreeElement(BinaryTreeElement):
+    """
+    This class describes an AVL tree element: a binary tree element
+    that also stores the number of nodes of its subtree
+    """
+    __slots__ = ("size",)
+
+    def update(self):
+        """
+        Recomputes the stored height and size from the children.
+        :return:
+        """
+        super().update()
+        self.size = 1 + (self.left.size if self.left else 0) + (self.right.size if self.right else 0)
+        return
+
+
+class AVLTree(BinarySearchTree):
+    """
+    This class describes an AVL tree: a binary search tree where the
+    heights of the two subtrees of every node differ by at most one.
+    Every node stores its height, so a balance factor is an O(1) read
+    and an insert or delete restores the balance with at most two
+    rotations per node on the way back to the root. Insert, delete and
+    search are O(lg(n)) in the worst case and iterative: the path from
+    the root is kept in a list instead of on the call stack.
+    The nodes also store their subtree sizes, which turns the tree into
+    an order statistic tree: rank, select and count_range descend a
+    single path, so they are O(lg(n)) as well.
+    """
+    element_class = AVLTreeElement
+    stored_fields = ("height", "size")
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    def rank(self, data):
+        """
+        Returns the number of values less than the data, which is the
+        index the data has (or would have) in sorted order.
+        :param data:
+        :return:
+        """
+        self._check_threads()
+        rank = 0
+        node = self.root
+        while node:
+            if node.data < data:
+                rank += 1 + (node.left.size if node.left else 0)
+                node = node.right
+            else:
+                node = node.left
+        return rank
+
+    def select(self, k):
+        """
+        Returns the k-th smallest value, counting from 0; negative k
+        counts from the largest value like a list index.
+        :param k:
+        :return:
+        """
+        self._check_threads()
+        n = len(self)
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError("select index out of range")
+
+        node = self.root
+        while True:
+            left = node.left.size if node.left else 0
+            if k < left:
+                node = node.left
+            elif k == left:
+                return node.data
+            else:
+                k -= left + 1
+                node = node.right
+
+    def count_range(self, lo, hi):
+        """
+        Returns the number of values v with lo <= v < hi.
+        :param lo:
+        :param hi:
+        :return:
+        """
+        if not lo < hi:
+            return 0
+        return self.rank(hi) - self.rank(lo)
+
+    def _update(self, node):
+        """
+        Helper method that recomputes the height and the size of the
+        node from those of its children.
+        :param node:
+        :return:
+        """
+        left = node.left
+        right = node.right
+        if left and right:
+            node.height = 1 + (left.height if left.height > right.height else right.height)
+            node.size = 1 + left.size + right.size
+        elif left:
+            node.height = 1 + left.height
+            node.size = 1 + left.size
+        elif right:
+            node.height = 1 + right.height
+            node.size = 1 + right.size
+        else:
+            node.height = 1
+            node.size = 1
+        return
+
+    def _check_node(self, node):
+        """
+        Helper method that checks the AVL balance of the node.
+        :param node:
+        :return:
+        """
+        if abs(self.get_balance_factor(node)) > 1:
+            raise ValueError("Node {0} is out of balance".format(node))
+        return
+
+    def _rebalance(self, node):
+        """
+        Helper method that updates the node and restores its balance
+        with a single or a double rotation.
+        :param node:
+        :return: the new root of the subtree
+        """
+        self._update(node)
         b = self.get_balance_factor(node)
-        if b > 0:
-            node = self.rotate_right(node)
-        elif b < 0:
-            node = self.rotate_left(node)
+        if b > 1:
+            if self.get_balance_factor(node.right) < 0:
+                node.right = self.rotate_right(node.right)
+            return self.rotate_left(node)
+        if b < -1:
+            if self.get_balance_factor(node.left) > 0:
+                node.left = self.rotate_left(node.left)
+            return self.rotate_right(node)
+        return node
+
+    def _update_path(self, path):
+        """
+        Helper method that rebalances the nodes of the path from the
+        deepest one up to the root and reattaches rotated subtrees.
+        Every node is updated, since the sizes change all the way up.
+        :param path: list of nodes from the root down
+        :return:
+        """
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            new_root = self._rebalance(node)
+            if new_root is node:
+                continue
+            if i == 0:
+                self.root = new_root
+            elif path[i - 1].left is node:
+                path[i - 1].left = new_root
+            else:
+                path[i - 1].right = new_root
+        return
+
+
+
+class ArrayBinarySearchTree:
+    """
+    This class describes a binary search tree of integer keys stored in
+    three parallel arrays instead of node objects: keys[i], left[i] and
+    right[i] describe the node in slot i, and a child index of NIL
+    means there is no child. Each node costs 24 bytes of array storage
+    (signed 64-bit integers) and no Python object. Deleted slots are
+    chained into a free list through the left array and reused by the
+    next inserts.
+    The methods mirror BinarySearchTree, with slot indices taking the
+    place of node objects.
+    """
+    NIL = -1
+
+    def __init__(self):
+        self.root = self.NIL
+        self.keys = array("q")
+        self.left = array("q")
+        self.right = array("q")
+        self.free = self.NIL
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, data):
+        return self.search(data) != self.NIL
+
+    def get_root(self):
+        return self.root
+
+    def get_value(self, node):
+        return self.keys[node]
 
-        # Recursively balance for all children
-        self.balance_tree(node.get_left())
-        self.balance_tree(node.get_right())
+    def search(self, data):
+        """
+        Returns the slot of the node that holds the key, or NIL.
+        :param data:
+        :return:
+        """
+        keys = self.keys
+        node = self.root
+        while node != self.NIL:
+            key = keys[node]
+            if data < key:
+                node = self.left[node]
+            elif key < data:
+                node = self.right[node]
+            else:
+                return node
+        return self.NIL
 
+    def insert(self, data):
+        """
+        Inserts the key into the tree.
+        :param data: integer key
+        :return: slot of the new node
+        """
+        new_node = self._allocate(data)
+        if self.root == self.NIL:
+            self.root = new_node
+            return new_node
+
+        keys = self.keys
+        node = self.root
+        while True:
+            if data < keys[node]:
+                if self.left[node] == self.NIL:
+                    self.left[node] = new_node
+                    break
+                node = self.left[node]
+            else:
+                if self.right[node] == self.NIL:
+                    self.right[node] = new_node
+                    break
+                node = self.right[node]
+        return new_node
+
+    def delete(self, data):
+        """
+        Removes one occurrence of the key from the tree. A node with
+        two children takes the key of its in-order successor, whose
+        slot is freed instead.
+        :param data:
+        :return:
+        """
+        NIL = self.NIL
+        keys = self.keys
+        parent = NIL
+        node = self.root
+        while node != NIL:
+            key = keys[node]
+            if data < key:
+                parent, node = node, self.left[node]
+            elif key < data:
+                parent, node = node, self.right[node]
+            else:
+                break
+        if node == NIL:
+            raise KeyError("{0} is not in the tree".format(data))
+
+        if self.left[node] != NIL and self.right[node] != NIL:
+            parent = node
+            successor = self.right[node]
+            while self.left[successor] != NIL:
+                parent = successor
+                successor = self.left[successor]
+            keys[node] = keys[successor]
+            node = successor
+
+        child = self.left[node] if self.left[node] != NIL else self.right[node]
+        if parent == NIL:
+            self.root = child
+        elif self.left[parent] == node:
+            self.left[parent] = child
+        else:
+            self.right[parent] = child
+        self._release(node)
+        return
+
+    def __iter__(self):
+        return self.inorder()
+
+    def inorder(self):
+        """
+        Generator of the keys inorder:
+        > all_left -> middle -> all right
+        :return:
+        """
+        return self._inorder(self.root)
+
+    def preorder(self):
+        """
+        Generator of the keys preorder:
+        > root > left > right
+        :return:
+        """
+        return self._preorder(self.root)
+
+    def postorder(self):
+        """
+        Generator of the keys postorder:
+        > left > right > root
+        :return:
+        """
+        return self._postorder(self.root)
+
+    def level_order(self):
+        """
+        Generator of the keys level by level, left to right.
+        :return:
+        """
+        NIL = self.NIL
+        queue = deque([self.root] if self.root != NIL else [])
+        while queue:
+            node = queue.popleft()
+            yield self.keys[node]
+            if self.left[node] != NIL:
+                queue.append(self.left[node])
+            if self.right[node] != NIL:
+                queue.append(self.right[node])
+
+    def range(self, lo, hi):
+        """
+        Generator of the keys k with lo <= k < hi in ascending order.
+        :param lo:
+        :param hi:
+        :return:
+        """
+        return self.irange(lo, hi, inclusive=(True, False))
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True), reverse=False):
+        """
+        Generator of the keys between minimum and maximum, pruning the
+        subtrees outside the bounds like BinarySearchTree.irange.
+        :param minimum: lower bound, None for no bound
+        :param maximum: upper bound, None for no bound
+        :param inclusive: pair of flags, whether the bounds are included
+        :param reverse: iterate from the largest key down
+        :return:
+        """
+        def below(key):
+            if minimum is None:
+                return False
+            return key < minimum if inclusive[0] else not minimum < key
+
+        def above(key):
+            if maximum is None:
+                return False
+            return maximum < key if inclusive[1] else not key < maximum
+
+        near, far = self.left, self.right
+        if reverse:
+            below, above = above, below
+            near, far = far, near
+        NIL = self.NIL
+        keys = self.keys
+        stack = []
+        node = self.root
+        while True:
+            while node != NIL:
+                if below(keys[node]):
+                    node = far[node]
+                else:
+                    stack.append(node)
+                    node = near[node]
+            if not stack:
+                return
+            node = stack.pop()
+            if above(keys[node]):
+                return
+            yield keys[node]
+            node = far[node]
+
+    def print_inorder(self, node):
+        """
+        Prints the tree inorder:
+        > all_left -> middle -> all right
+        :return:
+        """
+        for key in self._inorder(node):
+            print(key)
+
+    def print_preorder(self, node):
+        """
+        Prints the tree preorder:
+        > root > left > right
+        :return:
+        """
+        for key in self._preorder(node):
+            print(key)
+
+    def print_postorder(self, node):
+        """
+        Prints the tree postorder:
+        > left > right > root
+        :return:
+        """
+        for key in self._postorder(node):
+            print(key)
+
+    def print_preorder_iterative(self, node):
+        """
+        Prints the tree preorder:
+        > root > left > right
+        :return:
+        """
+        self.print_preorder(node)
+
+    def get_max_depth(self, node):
+        """
+        This method calculates the depth of the subtree with a level
+        by level walk.
+        :param node:
+        :return:
+        """
+        depth = 0
+        level = [node] if node != self.NIL else []
+        while level:
+            depth += 1
+            level = [child for node in level
+                     for child in (self.left[node], self.right[node]) if child != self.NIL]
+        return depth
+
+    def _inorder(self, node):
+        """
+        Helper generator of the keys of the subtree in inorder.
+        :param node:
+        :return:
+        """
+        NIL = self.NIL
+        stack = []
+        while stack or node != NIL:
+            while node != NIL:
+                stack.append(node)
+                node = self.left[node]
+            node = stack.pop()
+            yield self.keys[node]
+            node = self.right[node]
+
+    def _preorder(self, node):
+        """
+        Helper generator of the keys of the subtree in preorder.
+        :param node:
+        :return:
+        """
+        NIL = self.NIL
+        stack = [node] if node != NIL else []
+        while stack:
+            node = stack.pop()
+            yield self.keys[node]
+            if self.right[node] != NIL:
+                stack.append(self.right[node])
+            if self.left[node] != NIL:
+                stack.append(self.left[node])
+
+    def _postorder(self, node):
+        """
+        Helper generator of the keys of the subtree in postorder.
+        :param node:
+        :return:
+        """
+        NIL = self.NIL
+        stack = []
+        last = NIL
+        while stack or node != NIL:
+            while node != NIL:
+                stack.append(node)
+                node = self.left[node]
+            top = stack[-1]
+            right = self.right[top]
+            if right != NIL and right != last:
+                node = right
+            else:
+                stack.pop()
+                yield self.keys[top]
+                last = top
+
+    def _allocate(self, data):
+        """
+        Helper method that takes a slot from the free list, or appends
+        a new one, and stores the key in it. The key is stored first:
+        if it doesn't fit the array (OverflowError, TypeError) the tree
+        is left unchanged.
+        :param data:
+        :return: the slot
+        """
+        if self.free == self.NIL:
+            self.keys.append(data)
+            self.left.append(self.NIL)
+            self.right.append(self.NIL)
+            self.size += 1
+            return len(self.keys) - 1
+
+        node = self.free
+        self.keys[node] = data
+        self.free = self.left[node]
+        self.left[node] = self.NIL
+        self.right[node] = self.NIL
+        self.size += 1
+        return node
+
+    def _release(self, node):
+        """
+        Helper method that pushes the slot onto the free list.
+        :param node:
+        :return:
+        """
+        self.size -= 1
+        self.keys[node] = 0
+        self.left[node] = self.free
+        self.right[node] = self.NIL
+        self.free = node
+        return
+
+
+class LCAIndex:
+    """
+    This class describes a lowest common ancestor index of a snapshot
+    of a binary tree, for any BinaryTree, not only search trees.
+        1. An iterative Euler tour records every node when it is
+           entered and again after each of its children, 2n - 1
+           entries in total, and the first entry of every node.
+        2. The lowest common ancestor of u and v is the shallowest
+           node of the tour between their first entries, a range
+           minimum query answered by a sparse table: level k holds the
+           minimum of every window of 2^k entries, and any range is
+           covered by two overlapping windows.
+    Every entry is packed as depth << shift | node number, so the
+    levels are built with the C-level min() and a query is two lookups
+    and one comparison. Building costs O(n * lg(n)) time and memory,
+    a query O(1). The index must be rebuilt after the tree changes.
+    """
+    def __init__(self, tree, by_value=False):
+        """
+        :param tree: BinaryTree or root node
+        :param by_value: queries pass values instead of nodes; a value
+                         that occurs several times means its shallowest
+                         (first in preorder) node
+        """
+        if isinstance(tree, BinaryTree):
+            tree._check_threads()
+            root = tree.root
+        else:
+            root = tree
+        self.by_value = by_value
+        self.nodes = []
+        self.positions = {}
+        self.table = []
+        self.shift = 0
+        self.mask = 0
+        if root is None:
+            return
+
+        nodes = self.nodes
+        positions = self.positions
+        depths = []
+        first = []
+        tour = []
+
+        def enter(node, depth):
+            positions.setdefault(node.data if by_value else node, len(nodes))
+            first.append(len(tour))
+            tour.append(len(nodes))
+            depths.append(depth)
+            nodes.append(node)
+
+        # Stack of [node number, next child: 0 left, 1 right, 2 done]
+        enter(root, 0)
+        stack = [[0, 0]]
+        while stack:
+            entry = stack[-1]
+            node = nodes[entry[0]]
+            if entry[1] == 2:
+                stack.pop()
+                if stack:
+                    tour.append(stack[-1][0])
+                continue
+
+            child = node.left if entry[1] == 0 else node.right
+            entry[1] += 1
+            if child is not None:
+                enter(child, depths[entry[0]] + 1)
+                stack.append([len(nodes) - 1, 0])
+
+        # Replace the node numbers of the positions by their first entries
+        for key, number in positions.items():
+            positions[key] = first[number]
+
+        self.shift = len(nodes).bit_length()
+        self.mask = (1 << self.shift) - 1
+        row = [depths[number] << self.shift | number for number in tour]
+        self.table = [row]
+        width = 1
+        while 2 * width <= len(tour):
+            row = list(map(min, row, row[width:]))
+            self.table.append(row)
+            width *= 2
+
+    def lca(self, a, b):
+        """
+        Returns the lowest common ancestor node of a and b.
+        :param a: node (or value when the index is built by value)
+        :param b: node (or value when the index is built by value)
+        :return:
+        """
+        i = self.positions[a]
+        j = self.positions[b]
+        if i > j:
+            i, j = j, i
+        level = (j - i + 1).bit_length() - 1
+        row = self.table[level]
+        left = row[i]
+        right = row[j - (1 << level) + 1]
+        return self.nodes[(left if left < right else right) & self.mask]
+
+    def lca_many(self, pairs):
+        """
+        Answers a batch of queries.
+        :param pairs: iterable of (a, b) pairs
+        :return: list of lowest common ancestor nodes
+        """
+        positions = self.positions
+        table = self.table
+        nodes = self.nodes
+        mask = self.mask
+
+        result = []
+        for a, b in pairs:
+            i = positions[a]
+            j = positions[b]
+            if i > j:
+                i, j = j, i
+            level = (j - i + 1).bit_length() - 1
+            row = table[level]
+            left = row[i]
+            right = row[j - (1 << level) + 1]
+            result.append(nodes[(left if left < right else right) & mask])
+        return result
 
 
 if __name__=="__main__":
@@ -264,3 +1485,62 @@ if __name__=="__main__":
     print("\nPreorder:")
     t.print_preorder_iterative(t.get_root())
     print ("Balance factor = {0}".format(t.get_balance_factor(t.get_root())))
+
+    print("\nInorder = {0}".format(list(t.inorder(morris=True))))
+    print("Level order = {0}".format(list(t.level_order())))
+    print("3 <= x < 12 = {0}".format(list(t.range(3, 12))))
+
+    lca = t.lca_index(by_value=True)
+    print("LCA(3, 5) = {0}, LCA(25, 55) = {1}".format(lca.lca(3, 5), lca.lca(25, 55)))
+
+    print("\nBulk loaded tree:")
+    t = BinarySearchTree.from_sorted(range(1000))
+    print("Depth = {0}".format(t.get_max_depth(t.get_root())))
+    t = BinarySearchTree()
+    for aa in range(100):
+        t.insert(aa)
+    t.rebalance()
+    print("Depth after rebalance = {0}".format(t.get_max_depth(t.get_root())))
+
+    print("\nArray tree inorder:")
+    array_tree = ArrayBinarySearchTree()
+    for aa in a:
+        array_tree.insert(aa)
+    array_tree.delete(10)
+    array_tree.print_inorder(array_tree.get_root())
+
+    print("\nAVL tree:")
+    avl = AVLTree()
+    for aa in range(1, 1001):
+        avl.insert(aa)
+    for aa in range(1, 1001, 2):
+        avl.delete(aa)
+    print("Depth = {0}".format(avl.get_max_depth(avl.get_root())))
+    print("Balance factor = {0}".format(avl.get_balance_factor(avl.get_root())))
+    print("Size = {0}, median = {1}, rank(500) = {2}".format(
+        len(avl), avl.select(len(avl) // 2), avl.rank(500)))
+
+    print("\nRandom inserts and deletes:")
+    import random
+    for tree_class in (BinarySearchTree, AVLTree):
+        tree = tree_class()
+        present = []
+        for step in range(2000):
+            if present and random.random() < 0.4:
+                tree.delete(present.pop(random.randrange(len(present))))
+            else:
+                value = random.randint(0, 500)
+                tree.insert(value)
+                present.append(value)
+            if step % 100 == 0:
+                tree.validate()
+        tree.validate()
+        print("{0}: validated, inorder matches = {1}".format(
+            tree_class.__name__, list(tree.inorder()) == sorted(present)))
+
+    print("\nTree linked by hand:")
+    t = BinaryTree()
+    t.root = BinaryTreeElement(1)
+    t.root.set_left(BinaryTreeElement(2))
+    t.root.get_left().set_left(BinaryTreeElement(3))
+    print("Repaired nodes = {0}, depth = {1}".format(t.validate(repair=True), t.root.height))